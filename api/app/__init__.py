@@ -1,14 +1,24 @@
 import sentry_sdk
+import sqlalchemy as sa
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from config import Config
 
-
 db = SQLAlchemy()
 migrate = Migrate()
 
 
+def set_sqlite_pragmas(pragmas):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    return on_connect
+
+
 def create_app(config_class=Config):
     sentry_sdk.init(
         dsn="https://13bd9cf5b2b9f887a5716fedb0c1c17e@o4508912268738560.ingest.de.sentry.io/4508912270442576",
@@ -21,6 +31,28 @@ def create_app(config_class=Config):
     db.init_app(app)
     migrate.init_app(app, db)
 
+    with app.app_context():
+        if db.engine.dialect.name == "sqlite":
+            sa.event.listen(
+                db.engine, "connect", set_sqlite_pragmas(app.config["SQLITE_PRAGMAS"])
+            )
+
+    from app.auth.cache import token_cache
+
+    token_cache.init_app(app)
+
+    from app.auth.tokens import token_revocations
+
+    token_revocations.init_app(app)
+
+    from app.auth.ratelimit import login_limiter
+
+    login_limiter.init_app(app)
+
+    from app.audit.log import audit_log
+
+    audit_log.init_app(app)
+
     from app.core import bp as core_bp
 
     app.register_blueprint(core_bp)
@@ -29,6 +61,10 @@ def create_app(config_class=Config):
 
     app.register_blueprint(auth_bp)
 
+    from app.audit import bp as audit_bp
+
+    app.register_blueprint(audit_bp)
+
     return app
 
 
@@ -0,0 +1,184 @@
+import enum
+import json
+import logging
+import queue
+import threading
+from datetime import datetime, timezone
+
+import sentry_sdk
+import sqlalchemy as sa
+from app import db
+from app.models import AuditEvent
+
+logger = logging.getLogger(__name__)
+
+
+def audit_value(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def audit_diff(obj, data, fields):
+    # {field: [old, new]} for the fields of `data` that change `obj`
+    diff = {}
+    for field in fields:
+        if field in data:
+            old = audit_value(getattr(obj, field))
+            new = audit_value(data[field])
+            if old != new:
+                diff[field] = [old, new]
+    return diff
+
+
+def audit_created(obj):
+    return {key: [None, audit_value(value)] for key, value in obj.serialize().items()}
+
+
+def audit_deleted(obj):
+    return {key: [audit_value(value), None] for key, value in obj.serialize().items()}
+
+
+class SentrySink:
+    def __init__(self, actions):
+        self.actions = actions
+
+    def emit(self, events):
+        for event in events:
+            if event["action"] in self.actions:
+                sentry_sdk.capture_message(event["message"])
+
+
+class JsonlSink:
+    def __init__(self, path):
+        self.path = path
+
+    def emit(self, events):
+        with open(self.path, "a") as file:
+            for event in events:
+                file.write(json.dumps(event) + "\n")
+
+
+class TableSink:
+    def __init__(self, app):
+        self.app = app
+
+    def emit(self, events):
+        with self.app.app_context():
+            db.session.execute(
+                sa.insert(AuditEvent),
+                [
+                    {
+                        "created_at": datetime.fromisoformat(event["timestamp"]),
+                        "actor_id": event["actor"]["id"],
+                        "action": event["action"],
+                        "entity_type": event["entity"]["type"],
+                        "entity_id": event["entity"]["id"],
+                        "payload": json.dumps(event),
+                    }
+                    for event in events
+                ],
+            )
+            db.session.commit()
+
+
+class AuditLog:
+    # Write routes publish audit events to a bounded in-process queue, a
+    # background worker drains it in batches to the configured sinks so the
+    # request thread never waits on a sink.
+
+    def __init__(self):
+        self.sinks = []
+        self.queue = queue.Queue()
+        self.batch_size = 100
+        self.published = 0
+        self.dropped = 0
+        self.failed = 0
+        self._worker = None
+
+    def init_app(self, app):
+        self.shutdown()
+        self.queue = queue.Queue(maxsize=app.config["AUDIT_QUEUE_SIZE"])
+        self.batch_size = app.config["AUDIT_BATCH_SIZE"]
+        self.published = 0
+        self.dropped = 0
+        self.failed = 0
+        self.sinks = []
+        for name in app.config["AUDIT_SINKS"]:
+            if name == "sentry":
+                self.sinks.append(SentrySink(app.config["AUDIT_SENTRY_ACTIONS"]))
+            elif name == "jsonl":
+                self.sinks.append(JsonlSink(app.config["AUDIT_JSONL_PATH"]))
+            elif name == "table":
+                self.sinks.append(TableSink(app))
+        self._worker = threading.Thread(
+            target=self._run, args=(self.queue,), name="audit-log", daemon=True
+        )
+        self._worker.start()
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+
+    def publish(self, actor, action, entity, message, diff=None):
+        event = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "actor": {"id": actor.id, "fullname": actor.fullname} if actor else None,
+            "action": action,
+            "entity": entity,
+            "diff": diff or {},
+            "message": message,
+        }
+        try:
+            self.queue.put_nowait(event)
+            self.published += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        # block until every published event went through the sinks
+        self.queue.join()
+
+    def shutdown(self):
+        if self._worker is not None:
+            self.queue.put(None)
+            self._worker.join()
+            self._worker = None
+
+    def stats(self):
+        return {
+            "queue_depth": self.queue.qsize(),
+            "published": self.published,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+    def _run(self, events_queue):
+        while True:
+            event = events_queue.get()
+            if event is None:
+                events_queue.task_done()
+                return
+            batch = [event]
+            while len(batch) < self.batch_size:
+                try:
+                    event = events_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if event is None:
+                    events_queue.put(None)
+                    events_queue.task_done()
+                    break
+                batch.append(event)
+            for sink in self.sinks:
+                try:
+                    sink.emit(batch)
+                except Exception:
+                    self.failed += len(batch)
+                    logger.exception("Audit sink %s failed", type(sink).__name__)
+            for _ in batch:
+                events_queue.task_done()
+
+
+audit_log = AuditLog()
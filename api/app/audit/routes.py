@@ -0,0 +1,9 @@
+from app.audit import bp
+from app.audit.log import audit_log
+from app.auth.auth import token_auth
+
+
+@bp.route("/audit/stats", methods=["GET"])
+@token_auth.login_required(role="admin")
+def audit_stats():
+    return audit_log.stats(), 200
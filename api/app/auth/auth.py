@@ -1,6 +1,10 @@
 import sqlalchemy as sa
+from flask import current_app, g
 from flask_httpauth import HTTPBasicAuth, HTTPTokenAuth
 from app import db
+from app.auth.cache import AuthUser, token_cache
+from app.auth.ratelimit import login_limiter
+from app.auth.tokens import load_signed_token, token_revocations
 from app.models import User
 
 basic_auth = HTTPBasicAuth()
@@ -9,15 +13,54 @@ token_auth = HTTPTokenAuth()
 
 @basic_auth.verify_password
 def verify_password(email, password):
+    # refuse before hashing anything once the account is rate limited, the
+    # key is normalized so that case or spacing variants share the budget
+    key = email.strip().lower()
+    retry_after = login_limiter.retry_after(key)
+    if retry_after:
+        g.login_retry_after = retry_after
+        return None
     user = db.session.scalar(sa.select(User).where(User.email == email))
     if user and user.check_password(password):
+        login_limiter.reset(key)
+        # upgrade the stored hash to the current policy, committed with the token
+        if user.password_needs_rehash():
+            user.set_password(password)
         return user
+    login_limiter.fail(key)
+
+
+@basic_auth.error_handler
+def basic_auth_error(status):
+    retry_after = g.pop("login_retry_after", None)
+    if retry_after:
+        return (
+            {"error": "Too many login attempts"},
+            429,
+            {"Retry-After": str(retry_after)},
+        )
+    return "Unauthorized Access", status
 
 
 @token_auth.verify_token
 def verify_token(token):
-    # TODO: add check_token method to User class
-    return User.check_token(token) if token else None
+    if not token:
+        return None
+    user = token_cache.get(token)
+    # entries cached before a revocation, possibly made by another worker,
+    # are checked again
+    if user is not None and not token_revocations.is_revoked(user.id, user.issued_at):
+        return user
+    if current_app.config["TOKEN_MODE"] == "signed":
+        return load_signed_token(token)
+    user = User.check_token(token)
+    if user is None:
+        return None
+    user = AuthUser.from_user(user)
+    token_cache.set(token, user)
+    # already on the database, keep later cache hits free of queries
+    token_revocations.reload()
+    return user
 
 
 @token_auth.get_user_roles
@@ -0,0 +1,100 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+from app.models import Role
+
+
+class AuthUser(NamedTuple):
+    # What the routes need from token_auth.current_user(), without a session
+    id: int
+    fullname: str
+    role: Role
+    token_expiration: datetime
+    # when the token was last checked against the source of truth, compared
+    # with the user revocation time
+    issued_at: float
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(
+            id=user.id,
+            fullname=user.fullname,
+            role=user.role,
+            token_expiration=user.token_expiration.replace(tzinfo=timezone.utc),
+            issued_at=time.time(),
+        )
+
+    def get_roles(self):
+        return self.role.value
+
+
+class TokenCache:
+    # Bounded LRU of token -> AuthUser, entries live at most `ttl` seconds
+    # and never past the token expiration.
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.maxsize = app.config["TOKEN_CACHE_SIZE"]
+        self.ttl = app.config["TOKEN_CACHE_TTL"]
+        self.clear()
+
+    def get(self, token):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None:
+                user, cached_until = entry
+                if cached_until > time.monotonic() and (
+                    user.token_expiration > datetime.now(timezone.utc)
+                ):
+                    self._entries.move_to_end(token)
+                    self.hits += 1
+                    return user
+                del self._entries[token]
+            self.misses += 1
+            return None
+
+    def set(self, token, user):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[token] = (user, time.monotonic() + self.ttl)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for token in [
+                token
+                for token, (user, _) in self._entries.items()
+                if user.id == user_id
+            ]:
+                del self._entries[token]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+token_cache = TokenCache()
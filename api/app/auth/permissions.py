@@ -0,0 +1,73 @@
+from types import MappingProxyType
+
+# RBAC matrix: role -> "object:action" targets the role may run.
+# Built once at import, frozen sets give O(1) membership checks.
+PERMISSIONS = MappingProxyType(
+    {
+        "admin": frozenset(
+            {
+                "users:create",
+                "users:list",
+                "users:show",
+                "users:update",
+                "users:delete",
+                "users:logout",
+                "clients:list",
+                "clients:show",
+                "contracts:list",
+                "contracts:show",
+                "contracts:stats",
+                "contracts:create",
+                "contracts:import",
+                "contracts:update",
+                "contracts:delete",
+                "events:list",
+                "events:show",
+                "events:calendar",
+                "events:add-support",
+                "changes:list",
+            }
+        ),
+        "sales": frozenset(
+            {
+                "users:list",
+                "clients:create",
+                "clients:import",
+                "clients:list",
+                "clients:show",
+                "clients:update",
+                "clients:delete",
+                "contracts:list",
+                "contracts:show",
+                "contracts:stats",
+                "events:list",
+                "events:show",
+                "events:calendar",
+                "events:create",
+                "events:import",
+                "events:delete",
+            }
+        ),
+        "support": frozenset(
+            {
+                "clients:list",
+                "clients:show",
+                "contracts:list",
+                "contracts:show",
+                "contracts:stats",
+                "events:list",
+                "events:show",
+                "events:calendar",
+                "events:update",
+            }
+        ),
+    }
+)
+
+
+def get_permissions(role):
+    return PERMISSIONS.get(role, frozenset())
+
+
+def is_authorized(role, target):
+    return target in get_permissions(role)
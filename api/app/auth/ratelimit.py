@@ -0,0 +1,62 @@
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class LoginLimiter:
+    # At most `max_attempts` failed logins per account in a sliding `window`
+    # of seconds, checked before the password hash is computed. Accounts are
+    # kept in a bounded LRU.
+
+    def __init__(self, max_attempts=5, window=300, maxsize=10000):
+        self.max_attempts = max_attempts
+        self.window = window
+        self.maxsize = maxsize
+        self._failures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.max_attempts = app.config["LOGIN_MAX_ATTEMPTS"]
+        self.window = app.config["LOGIN_WINDOW"]
+        self.clear()
+
+    def retry_after(self, key):
+        # seconds until `key` may try again, 0 when it is not limited
+        with self._lock:
+            failures = self._prune(key)
+            if failures is None or len(failures) < self.max_attempts:
+                return 0
+            return max(1, int(failures[0] + self.window - time.monotonic()) + 1)
+
+    def fail(self, key):
+        with self._lock:
+            failures = self._prune(key)
+            if failures is None:
+                failures = self._failures[key] = deque(maxlen=self.max_attempts)
+            failures.append(time.monotonic())
+            self._failures.move_to_end(key)
+            while len(self._failures) > self.maxsize:
+                self._failures.popitem(last=False)
+
+    def reset(self, key):
+        with self._lock:
+            self._failures.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._failures.clear()
+
+    def _prune(self, key):
+        failures = self._failures.get(key)
+        if failures is None:
+            return None
+        expired = time.monotonic() - self.window
+        while failures and failures[0] <= expired:
+            failures.popleft()
+        if not failures:
+            del self._failures[key]
+            return None
+        return failures
+
+
+login_limiter = LoginLimiter()
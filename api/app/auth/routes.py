@@ -1,15 +1,27 @@
-from flask import request
+from flask import current_app, request
 from app import db
 from app.auth import bp
 from app.auth.auth import basic_auth
 from app.auth.auth import token_auth
+from app.auth.cache import token_cache
+from app.auth.permissions import get_permissions, is_authorized
+from app.auth.tokens import issue_signed_token, revoke_tokens
+from app.models import User
 
 
 @bp.route("/tokens", methods=["POST"])
 @basic_auth.login_required()
 def get_token():
-    token = basic_auth.current_user().get_token()
+    user = basic_auth.current_user()
+    if current_app.config["TOKEN_MODE"] == "signed":
+        # nothing to write unless the password was rehashed
+        db.session.commit()
+        return {"token": issue_signed_token(user)}
+    current_token = user.token
+    token = user.get_token(current_app.config["TOKEN_EXPIRES_IN"])
     db.session.commit()
+    if token != current_token:
+        token_cache.invalidate_user(user.id)
     return {"token": token}
 
 
@@ -19,56 +31,68 @@ def authenticate_token():
     return {"message": "Authenticated"}, 200
 
 
+# logout, revokes every token of the current user
+@bp.route("/tokens", methods=["DELETE"])
+@token_auth.login_required()
+def revoke_token():
+    user = db.get_or_404(User, token_auth.current_user().id)
+    user.token = None
+    user.token_expiration = None
+    db.session.commit()
+    revoke_tokens(user.id)
+    return {"message": "Logged out"}, 200
+
+
+# revoke every token of a user [auth, admin]
+@bp.route("/users/<id>/tokens", methods=["DELETE"])
+@token_auth.login_required(role="admin")
+def revoke_user_tokens(id):
+    user = db.get_or_404(User, id)
+    user.token = None
+    user.token_expiration = None
+    db.session.commit()
+    revoke_tokens(user.id)
+    return {"message": "User logged out"}, 200
+
+
+@bp.route("/tokens/cache", methods=["GET"])
+@token_auth.login_required(role="admin")
+def token_cache_stats():
+    return token_cache.stats(), 200
+
+
+@bp.route("/authorizations", methods=["GET"])
+@token_auth.login_required()
+def list_authorizations():
+    user = token_auth.current_user()
+    return {
+        "role": user.role.value,
+        "permissions": sorted(get_permissions(user.role.value)),
+        "expiration": user.token_expiration.isoformat(),
+    }, 200
+
+
 @bp.route("/authorizations", methods=["POST"])
 @token_auth.login_required()
 def check_authorizations():
-    target = request.get_json()["target"]
+    target = request.get_json().get("target")
     if not target:
         return {"message": "Bad request"}, 400
     user_role = token_auth.current_user().role.value
-    authorizations = {
-        "admin": [
-            "users:create",
-            "users:list",
-            "users:show",
-            "users:update",
-            "users:delete",
-            "clients:list",
-            "clients:show",
-            "contracts:list",
-            "contracts:show",
-            "contracts:create",
-            "contracts:update",
-            "contracts:delete",
-            "events:list",
-            "events:show",
-            "events:update-support",
-        ],
-        "sales": [
-            "users:list",
-            "clients:create",
-            "clients:list",
-            "clients:show",
-            "clients:update",
-            "clients:delete",
-            "contracts:list",
-            "contracts:show",
-            "events:list",
-            "events:show",
-            "events:create",
-            "events:delete",
-        ],
-        "support": [
-            "clients:list",
-            "clients:show",
-            "contracts:list",
-            "contracts:show",
-            "events:list",
-            "events:show",
-            "events:update",
-        ],
-    }
-
-    if target in authorizations[user_role]:
+    if is_authorized(user_role, target):
         return {"message": "Authorized"}, 200
     return {"message": "Unauthorized"}, 403
+
+
+@bp.route("/authorizations/batch", methods=["POST"])
+@token_auth.login_required()
+def check_authorizations_batch():
+    targets = request.get_json().get("targets")
+    if not targets or not isinstance(targets, list):
+        return {"message": "Bad request"}, 400
+    user_role = token_auth.current_user().role.value
+    return {
+        "authorizations": {
+            target: is_authorized(user_role, target) for target in targets
+        }
+    }, 200
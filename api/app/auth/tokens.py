@@ -0,0 +1,133 @@
+import threading
+import time
+from datetime import datetime, timezone
+
+import sqlalchemy as sa
+from app import db
+from app.auth.cache import AuthUser, token_cache
+from app.models import Role, TokenRevocation
+from config import DEFAULT_SECRET_KEY
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+# Stateless signed tokens (TOKEN_MODE = "signed"): the token carries the user
+# id, name, role and expiry, so issuing one writes nothing and verifying one
+# reads nothing. The secret key is then the only trust root: a signed mode app
+# refuses to start with the public default key, and the signature carries its
+# own timestamp, checked against the token lifetime.
+# Revocation works as a per-user token generation: the time of the last
+# revocation, held in memory. Signed tokens and token cache entries older
+# than it are refused, in both token modes.
+
+
+def serializer():
+    return URLSafeTimedSerializer(current_app.config["SECRET_KEY"], salt="auth-token")
+
+
+def issue_signed_token(user):
+    now = time.time()
+    return serializer().dumps(
+        {
+            "id": user.id,
+            "fn": user.fullname,
+            "role": user.role.value,
+            "iat": now,
+            "exp": now + current_app.config["TOKEN_EXPIRES_IN"],
+        }
+    )
+
+
+def load_signed_token(token):
+    try:
+        claims = serializer().loads(
+            token, max_age=current_app.config["TOKEN_EXPIRES_IN"]
+        )
+    except BadSignature:
+        return None
+    if claims["exp"] < time.time():
+        return None
+    if token_revocations.is_revoked(claims["id"], claims["iat"]):
+        return None
+    return AuthUser(
+        id=claims["id"],
+        fullname=claims["fn"],
+        role=Role(claims["role"]),
+        token_expiration=datetime.fromtimestamp(claims["exp"], timezone.utc),
+        issued_at=claims["iat"],
+    )
+
+
+def revoke_tokens(user_id):
+    # every token of the user issued or cached before now is refused, by this
+    # worker at once and by the others on their next reload
+    token_cache.invalidate_user(user_id)
+    token_revocations.revoke(user_id)
+
+
+class TokenRevocations:
+    # user id -> revocation time, tokens issued before it are refused.
+    # The list is persisted in the token_revocation table and reloaded every
+    # `refresh` seconds so other workers see revocations without a query per
+    # request.
+
+    def __init__(self, refresh=30, lifetime=3600):
+        self.refresh = refresh
+        self.lifetime = lifetime
+        self._revoked = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        if (
+            app.config["TOKEN_MODE"] == "signed"
+            and not app.testing
+            and app.config["SECRET_KEY"] in (None, "", DEFAULT_SECRET_KEY)
+        ):
+            raise RuntimeError("TOKEN_MODE=signed needs its own SECRET_KEY")
+        self.refresh = app.config["TOKEN_REVOCATION_REFRESH"]
+        self.lifetime = app.config["TOKEN_EXPIRES_IN"]
+        with self._lock:
+            self._revoked = {}
+            self._loaded_at = None
+
+    def revoke(self, user_id):
+        now = time.time()
+        revoked_at = datetime.fromtimestamp(now, timezone.utc)
+        revocation = db.session.get(TokenRevocation, user_id)
+        if revocation is None:
+            db.session.add(TokenRevocation(user_id=user_id, revoked_at=revoked_at))
+        else:
+            revocation.revoked_at = revoked_at
+        db.session.commit()
+        with self._lock:
+            self._revoked[user_id] = now
+
+    def is_revoked(self, user_id, issued_at):
+        self.reload()
+        with self._lock:
+            return issued_at <= self._revoked.get(user_id, 0)
+
+    def reload(self):
+        with self._lock:
+            if (
+                self._loaded_at is None
+                or time.monotonic() - self._loaded_at > self.refresh
+            ):
+                self._load()
+
+    def _load(self):
+        # revocations older than a token lifetime cannot match a live token
+        since = datetime.fromtimestamp(time.time() - self.lifetime, timezone.utc)
+        rows = db.session.execute(
+            sa.select(TokenRevocation.user_id, TokenRevocation.revoked_at).where(
+                TokenRevocation.revoked_at > since
+            )
+        )
+        self._revoked = {
+            user_id: revoked_at.replace(tzinfo=timezone.utc).timestamp()
+            for user_id, revoked_at in rows
+        }
+        self._loaded_at = time.monotonic()
+
+
+token_revocations = TokenRevocations()
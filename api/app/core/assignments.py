@@ -0,0 +1,73 @@
+import sqlalchemy as sa
+from app import db
+from app.models import Event, Role, User
+
+# Support assignment: a support user can only be booked on events that do not
+# overlap. Every query seeks on ix_event_support_schedule (support_contact_id,
+# event_end, event_start), so past events are skipped whatever the history.
+
+
+def overlapping(event, support_contact_id):
+    # the other events of the support user overlapping the event window
+    return sa.select(Event.id).where(
+        Event.support_contact_id == support_contact_id,
+        Event.event_end > event.event_start,
+        Event.event_start < event.event_end,
+        Event.id != event.id,
+    )
+
+
+def available_supports(event, limit):
+    # support users free during the event, least loaded first; the load is
+    # the number of their events still running from the event start onward
+    load = (
+        sa.select(sa.func.count(Event.id))
+        .where(
+            Event.support_contact_id == User.id,
+            Event.event_end >= event.event_start,
+            Event.id != event.id,
+        )
+        .scalar_subquery()
+    )
+    rows = db.session.execute(
+        sa.select(User, load.label("load"))
+        .where(
+            User.role == Role.SUPPORT,
+            ~overlapping(event, User.id).exists(),
+        )
+        .order_by(load, User.id)
+        .limit(limit)
+    )
+    return [
+        {"id": user.id, "fullname": user.fullname, "email": user.email, "load": load}
+        for user, load in rows
+    ]
+
+
+def lock_support(support_contact_id):
+    # Concurrent bookings of the same support user are serialized on its row
+    # (SQLite already serializes writers from the flush on).
+    db.session.execute(
+        sa.select(User.id).where(User.id == support_contact_id).with_for_update()
+    )
+
+
+def booking_conflicts(event, support_contact_id):
+    # Flushes the event and returns the ids of the events of the support user
+    # it overlaps, the session is rolled back when there are any. The support
+    # user must be locked first, see lock_support.
+    db.session.flush()
+    conflicts = db.session.scalars(
+        overlapping(event, support_contact_id).with_for_update()
+    ).all()
+    if conflicts:
+        db.session.rollback()
+    return conflicts
+
+
+def assign_support(event, support_contact):
+    # Returns the ids of the conflicting events, the assignment is only
+    # flushed when there are none.
+    lock_support(support_contact.id)
+    event.support_contact_id = support_contact.id
+    return booking_conflicts(event, support_contact.id)
@@ -0,0 +1,220 @@
+from datetime import datetime
+
+import sqlalchemy as sa
+from app import db
+from app.core.changes import record_changes
+from app.models import (
+    Client,
+    Contract,
+    ContractStatus,
+    Event,
+    validate_email,
+    validate_phone_number,
+)
+from flask import current_app
+
+# Bulk imports: rows are validated a chunk at a time with set based checks,
+# inserted with a single executemany INSERT and committed once per chunk.
+# Invalid rows are skipped and reported as {"row": index, "error": message}.
+# Core inserts skip the session events, the change log is written here from
+# the ids the INSERT returns, the search index follows through its triggers.
+# MySQL cannot return them from an executemany, there the rows go through the
+# session whose flush events write the change log.
+
+
+def bulk_import(model, rows, validate_chunk):
+    report = {"created": 0, "errors": []}
+    chunk_size = current_app.config["BULK_CHUNK_SIZE"]
+    for start in range(0, len(rows), chunk_size):
+        chunk = list(enumerate(rows[start : start + chunk_size], start))
+        values, errors = validate_chunk(chunk)
+        report["errors"].extend(errors)
+        if values:
+            if db.engine.dialect.insert_executemany_returning:
+                ids = db.session.scalars(
+                    sa.insert(model).returning(model.id), values
+                ).all()
+                record_changes(model.__tablename__, ids, "insert")
+            else:
+                db.session.add_all([model(**row) for row in values])
+            db.session.commit()
+            report["created"] += len(values)
+    return report
+
+
+def missing_fields(row, required_fields):
+    if not isinstance(row, dict):
+        return "Bad request"
+    missing = [field for field in required_fields if row.get(field) in (None, "")]
+    if missing:
+        return f"Missing fields: {', '.join(missing)}"
+    return None
+
+
+def import_clients(rows, author):
+    def validate_chunk(chunk):
+        values, errors = [], []
+        emails = {row.get("email") for _, row in chunk if isinstance(row, dict)}
+        fullnames = {row.get("fullname") for _, row in chunk if isinstance(row, dict)}
+        taken_emails = set(
+            db.session.scalars(sa.select(Client.email).where(Client.email.in_(emails)))
+        )
+        taken_fullnames = set(
+            db.session.scalars(
+                sa.select(Client.fullname).where(Client.fullname.in_(fullnames))
+            )
+        )
+        for index, row in chunk:
+            error = missing_fields(row, ["fullname", "email", "phone", "company"])
+            if error:
+                errors.append({"row": index, "error": error})
+                continue
+            if row["email"] in taken_emails:
+                errors.append(
+                    {"row": index, "error": "A client with that email already exists"}
+                )
+                continue
+            if row["fullname"] in taken_fullnames:
+                errors.append(
+                    {"row": index, "error": "A client with that name already exists"}
+                )
+                continue
+            try:
+                validate_email(row["email"])
+                validate_phone_number(row["phone"])
+            except AssertionError as e:
+                errors.append({"row": index, "error": f"{e}"})
+                continue
+            taken_emails.add(row["email"])
+            taken_fullnames.add(row["fullname"])
+            values.append(
+                {
+                    "fullname": row["fullname"],
+                    "email": row["email"],
+                    "phone": row["phone"],
+                    "company": row["company"],
+                    "sales_contact_id": author.id,
+                }
+            )
+        return values, errors
+
+    return bulk_import(Client, rows, validate_chunk)
+
+
+def import_contracts(rows):
+    def validate_chunk(chunk):
+        values, errors = [], []
+        client_ids = set()
+        for _, row in chunk:
+            try:
+                client_ids.add(int(row["client_id"]))
+            except (KeyError, TypeError, ValueError):
+                pass
+        sales_contacts = dict(
+            db.session.execute(
+                sa.select(Client.id, Client.sales_contact_id).where(
+                    Client.id.in_(client_ids)
+                )
+            ).all()
+        )
+        for index, row in chunk:
+            error = missing_fields(row, ["client_id", "total_amount"])
+            if error:
+                errors.append({"row": index, "error": error})
+                continue
+            try:
+                client_id = int(row["client_id"])
+                total_amount = float(row["total_amount"])
+            except (TypeError, ValueError):
+                errors.append({"row": index, "error": "Bad request"})
+                continue
+            if client_id not in sales_contacts:
+                errors.append({"row": index, "error": "Client not found"})
+                continue
+            values.append(
+                {
+                    "client_id": client_id,
+                    "sales_contact_id": sales_contacts[client_id],
+                    "total_amount": total_amount,
+                    "remaining_amount": total_amount,
+                    "status": ContractStatus.PENDING,
+                }
+            )
+        return values, errors
+
+    return bulk_import(Contract, rows, validate_chunk)
+
+
+def import_events(rows, author):
+    date_format = "%Y-%m-%d %H:%M:%S"
+
+    def validate_chunk(chunk):
+        values, errors = [], []
+        contract_ids = set()
+        for _, row in chunk:
+            try:
+                contract_ids.add(int(row["contract_id"]))
+            except (KeyError, TypeError, ValueError):
+                pass
+        contracts = {
+            contract.id: contract
+            for contract in db.session.execute(
+                sa.select(
+                    Contract.id,
+                    Contract.client_id,
+                    Contract.sales_contact_id,
+                    Contract.status,
+                ).where(Contract.id.in_(contract_ids))
+            )
+        }
+        for index, row in chunk:
+            error = missing_fields(
+                row,
+                [
+                    "title",
+                    "contract_id",
+                    "event_start",
+                    "event_end",
+                    "location",
+                    "attendees",
+                ],
+            )
+            if error:
+                errors.append({"row": index, "error": error})
+                continue
+            try:
+                contract_id = int(row["contract_id"])
+                attendees = int(row["attendees"])
+                event_start = datetime.strptime(row["event_start"], date_format)
+                event_end = datetime.strptime(row["event_end"], date_format)
+            except (TypeError, ValueError):
+                errors.append({"row": index, "error": "Bad request"})
+                continue
+            contract = contracts.get(contract_id)
+            if contract is None:
+                errors.append({"row": index, "error": "Contract not found"})
+                continue
+            if (
+                not contract.sales_contact_id == author.id
+                or not contract.status == ContractStatus.SIGNED
+            ):
+                errors.append(
+                    {"row": index, "error": "You are not authorized to do this"}
+                )
+                continue
+            values.append(
+                {
+                    "title": row["title"],
+                    "contract_id": contract_id,
+                    "client_id": contract.client_id,
+                    "sales_contact_id": author.id,
+                    "event_start": event_start,
+                    "event_end": event_end,
+                    "location": row["location"],
+                    "attendees": attendees,
+                    "notes": row.get("notes") or None,
+                }
+            )
+        return values, errors
+
+    return bulk_import(Event, rows, validate_chunk)
@@ -0,0 +1,81 @@
+import hashlib
+from datetime import timezone
+
+from app.core.pagination import page_response
+from app.models import merge_paths
+from flask import jsonify, make_response, request
+
+# Conditional GETs on the show and list routes.
+# The ETag is built from the query string and the version counter of every row
+# the route would serialize, expanded relations included, so a request with a
+# matching `If-None-Match` gets a 304 without serializing anything.
+# Show routes without relations also send `Last-Modified` from updated_at and
+# honour `If-Modified-Since`.
+
+
+def versions_etag(rows, fields=None, expand=None, next_cursor=None):
+    digest = hashlib.sha1(request.full_path.encode())
+    digest.update(f"next:{next_cursor};".encode())
+    tree = merge_paths(fields or {}, expand or {})
+    for row in rows:
+        add_versions(digest, row, tree)
+    return digest.hexdigest()
+
+
+def add_versions(digest, row, tree):
+    if row is None:
+        digest.update(b"-;")
+        return
+    digest.update(f"{row.__tablename__}:{row.id}:{row.version_id};".encode())
+    relationships = row.__mapper__.relationships
+    for name, subtree in tree.items():
+        if name not in relationships:
+            continue
+        value = getattr(row, name)
+        if relationships[name].uselist:
+            digest.update(b"[")
+            for related in value or []:
+                add_versions(digest, related, subtree)
+            digest.update(b"]")
+        else:
+            add_versions(digest, value, subtree)
+
+
+def conditional_response(etag, build, last_modified=None):
+    # `build` makes the full response, only called when the client copy is stale
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains(etag)
+    else:
+        not_modified = (
+            last_modified is not None
+            and request.if_modified_since is not None
+            and last_modified.replace(microsecond=0) <= request.if_modified_since
+        )
+    if not_modified:
+        response = make_response("", 304)
+    else:
+        response = make_response(build())
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    return response
+
+
+def conditional_page(rows, next_cursor, args):
+    etag = versions_etag(rows, next_cursor=next_cursor, **args)
+    return conditional_response(
+        etag,
+        lambda: page_response([row.serialize(**args) for row in rows], next_cursor),
+    )
+
+
+def conditional_show(row, args):
+    last_modified = None
+    tree = merge_paths(args["fields"] or {}, args["expand"] or {})
+    if not any(name in row.__mapper__.relationships for name in tree):
+        last_modified = row.updated_at.replace(tzinfo=timezone.utc)
+    return conditional_response(
+        versions_etag([row], **args),
+        lambda: jsonify(row.serialize(**args)),
+        last_modified,
+    )
@@ -0,0 +1,80 @@
+import sqlalchemy as sa
+from app import db
+from app.models import ChangeLog, Client, Contract, Event, User, is_updated
+
+# Append-only change log behind the /changes feed.
+# Every flush records one row per inserted, updated or deleted entity in the
+# same transaction as the change itself. The change id is the feed cursor, it
+# is allocated at insert time, not at commit, so a long transaction can commit
+# a lower id after a higher one was served. /changes only serves the changes
+# older than CHANGES_SAFETY_LAG so that every lower id has been committed.
+# Bulk imports insert with Core and record their rows through record_changes.
+
+TRACKED_MODELS = (User, Client, Contract, Event)
+MODELS = {model.__tablename__: model for model in TRACKED_MODELS}
+
+
+def record_changes(entity_type, ids, operation):
+    if ids:
+        db.session.execute(
+            sa.insert(ChangeLog),
+            [
+                {"entity_type": entity_type, "entity_id": id, "operation": operation}
+                for id in ids
+            ],
+        )
+
+
+@sa.event.listens_for(db.session, "after_flush")
+def log_changes(session, flush_context):
+    changes = [
+        (obj, "insert") for obj in session.new if isinstance(obj, TRACKED_MODELS)
+    ]
+    changes += [
+        (obj, "update")
+        for obj in session.dirty
+        if isinstance(obj, TRACKED_MODELS) and is_updated(obj)
+    ]
+    changes += [
+        (obj, "delete") for obj in session.deleted if isinstance(obj, TRACKED_MODELS)
+    ]
+    if changes:
+        session.connection().execute(
+            sa.insert(ChangeLog),
+            [
+                {
+                    "entity_type": obj.__tablename__,
+                    "entity_id": obj.id,
+                    "operation": operation,
+                }
+                for obj, operation in changes
+            ],
+        )
+
+
+def change_feed(changes):
+    # current state of the inserted and updated entities, one query per type
+    ids = {}
+    for change in changes:
+        if change.operation != "delete":
+            ids.setdefault(change.entity_type, set()).add(change.entity_id)
+    rows = {}
+    for entity_type, entity_ids in ids.items():
+        model = MODELS[entity_type]
+        for row in db.session.scalars(sa.select(model).where(model.id.in_(entity_ids))):
+            rows[(entity_type, row.id)] = row.serialize()
+    return [
+        {
+            "cursor": change.id,
+            "created_at": change.created_at,
+            "operation": change.operation,
+            "entity": change.entity_type,
+            "id": change.entity_id,
+            "data": (
+                None
+                if change.operation == "delete"
+                else rows.get((change.entity_type, change.entity_id))
+            ),
+        }
+        for change in changes
+    ]
@@ -0,0 +1,26 @@
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.models import merge_paths
+
+# Loading profiles used by the list routes.
+# A profile eager loads every relationship the serializer will expand (through
+# `expand` or nested `fields`), so a list route runs a fixed number of queries
+# whatever the number of rows.
+
+
+def profile(model, fields=None, expand=None):
+    return load_options(model, merge_paths(fields or {}, expand or {}))
+
+
+def load_options(model, tree):
+    options = []
+    relationships = model.__mapper__.relationships
+    for name, subtree in tree.items():
+        if name not in relationships:
+            continue
+        relationship = relationships[name]
+        loader = selectinload if relationship.uselist else joinedload
+        option = loader(getattr(model, name))
+        nested = load_options(relationship.mapper.class_, subtree)
+        options.append(option.options(*nested) if nested else option)
+    return options
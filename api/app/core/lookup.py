@@ -0,0 +1,59 @@
+import sqlalchemy as sa
+from app import db
+from app.models import Client, Contract, Event, User
+
+# Prefix lookups for the CLI prompts: the first id/label pairs whose name
+# starts with the prefix, case insensitive. The range on lower(name) is served
+# by the lower-case expression indexes, the rows are never fully loaded.
+
+# entity -> (model, name column, label columns, label)
+LOOKUPS = {
+    "users": (
+        User,
+        User.fullname,
+        (User.fullname, User.role),
+        lambda fullname, role: f"{fullname} ({role.value})",
+    ),
+    "clients": (
+        Client,
+        Client.fullname,
+        (Client.fullname, Client.company),
+        lambda fullname, company: f"{fullname} ({company})",
+    ),
+    "contracts": (
+        Contract,
+        Client.fullname,
+        (Client.fullname, Contract.status, Contract.remaining_amount),
+        lambda fullname, status, remaining: f"{fullname} ({status.value}, remaining {remaining})",
+    ),
+    "events": (
+        Event,
+        Event.title,
+        (Event.title, Event.event_start),
+        lambda title, start: f"{title} ({start:%Y-%m-%d})",
+    ),
+}
+
+
+def starts_with(column, prefix):
+    # Both sides are lowered by the database: SQLite's lower() only folds the
+    # ASCII letters, so "É" matches "Élodie" there but "é" does not.
+    name = sa.func.lower(column)
+    prefix = sa.func.lower(sa.literal(prefix, sa.String), type_=sa.String)
+    return [name >= prefix, name < prefix + "\uffff"]
+
+
+def lookup_query(entity, prefix, limit, conditions):
+    model, name, columns, _ = LOOKUPS[entity]
+    query = sa.select(model.id, *columns)
+    if model is Contract:
+        query = query.join_from(Contract, Client)
+    if prefix:
+        conditions = [*conditions, *starts_with(name, prefix)]
+    return query.where(*conditions).order_by(sa.func.lower(name), model.id).limit(limit)
+
+
+def lookup(entity, prefix, limit, conditions):
+    label = LOOKUPS[entity][3]
+    rows = db.session.execute(lookup_query(entity, prefix, limit, conditions))
+    return [{"id": id, "label": label(*values)} for id, *values in rows]
@@ -0,0 +1,34 @@
+from app import db
+from flask import current_app, jsonify, request, url_for
+
+# Keyset pagination on the primary key: `?limit=&after=`.
+# The next page is advertised with a `Link: <url>; rel="next"` header and its
+# cursor with `X-Next-Cursor`, so list bodies stay plain JSON arrays.
+# The change feed uses the same scheme with `?since=` as the cursor argument.
+
+
+def paginate(query, model, cursor="after"):
+    limit = request.args.get(
+        "limit", current_app.config["PAGINATION_DEFAULT_LIMIT"], type=int
+    )
+    limit = max(1, min(limit, current_app.config["PAGINATION_MAX_LIMIT"]))
+    after = request.args.get(cursor, type=int)
+    if after is not None:
+        query = query.where(model.id > after)
+    rows = db.session.scalars(query.order_by(model.id).limit(limit + 1)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1].id
+    return rows, next_cursor
+
+
+def page_response(items, next_cursor, cursor="after"):
+    response = jsonify(items)
+    if next_cursor is not None:
+        args = request.args.to_dict()
+        args[cursor] = next_cursor
+        next_url = url_for(request.endpoint, _external=True, **args)
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    return response
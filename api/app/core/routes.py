@@ -1,10 +1,112 @@
-import sentry_sdk
+from datetime import datetime, timedelta, timezone
+
 import sqlalchemy as sa
 from app import db
+from app.audit.log import audit_created, audit_deleted, audit_diff, audit_log
 from app.auth.auth import token_auth
+from app.auth.cache import token_cache
+from app.auth.permissions import is_authorized
+from app.auth.tokens import revoke_tokens
 from app.core import bp
-from app.models import Client, Contract, ContractStatus, Event, Role, User
-from flask import jsonify, request
+from app.core import loaders
+from app.core.assignments import (
+    assign_support,
+    available_supports,
+    booking_conflicts,
+    lock_support,
+)
+from app.core.bulk import import_clients, import_contracts, import_events
+from app.core.caching import conditional_page, conditional_show
+from app.core.changes import change_feed
+from app.core.lookup import LOOKUPS, lookup
+from app.core.pagination import page_response, paginate
+from app.core.search import search
+from app.core.stats import contract_stats
+from app.core.streaming import stream_response
+from app.models import (
+    Client,
+    Contract,
+    ChangeLog,
+    ContractStatus,
+    Event,
+    Role,
+    User,
+    parse_paths,
+)
+from flask import current_app, request
+from sqlalchemy.orm.exc import StaleDataError
+
+
+# the row was deleted by a concurrent request between our read and our write
+@bp.app_errorhandler(StaleDataError)
+def stale_data(error):
+    db.session.rollback()
+    return {"error": "Conflict, the resource was modified concurrently"}, 409
+
+
+def bulk_rows():
+    rows = request.get_json()
+    if not isinstance(rows, list) or not rows:
+        return None
+    if len(rows) > current_app.config["BULK_MAX_ROWS"]:
+        return None
+    return rows
+
+
+def audit(action, obj, message, diff=None):
+    audit_log.publish(
+        token_auth.current_user(),
+        action,
+        {"type": obj.__tablename__, "id": obj.id},
+        message,
+        diff,
+    )
+
+
+def serializer_args():
+    # Sparse fieldsets (`?fields=`) and expanded relations (`?expand=`)
+    return {
+        "fields": parse_paths(request.args.get("fields")),
+        "expand": parse_paths(request.args.get("expand")),
+    }
+
+
+def parse_datetime(value):
+    # ISO 8601, naive UTC for the comparisons with the stored dates
+    value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def updated_since(model):
+    # `?updated_since=` (ISO 8601, UTC when naive) to pull deltas, None if invalid
+    value = request.args.get("updated_since")
+    if value is None:
+        return []
+    try:
+        since = parse_datetime(value)
+    except ValueError:
+        return None
+    return [model.updated_at >= since]
+
+
+def event_window():
+    # `?from=&to=` keeps the events overlapping the window, None if invalid
+    conditions = []
+    try:
+        if request.args.get("from"):
+            conditions.append(Event.event_end >= parse_datetime(request.args["from"]))
+        if request.args.get("to"):
+            conditions.append(Event.event_start < parse_datetime(request.args["to"]))
+    except ValueError:
+        return None
+    if not conditions:
+        return []
+    # resolved on the covering schedule index, the keyset order on the primary
+    # key would otherwise make the planner scan the whole table
+    return [Event.id.in_(sa.select(Event.id).where(*conditions))]
+
 
 # User views
 
@@ -17,12 +119,16 @@ def user_index():
     filter_dept = request.args.get("dept")
     if filter_dept and filter_dept.upper() in Role._member_names_:
         conditions.append(User.role == Role(filter_dept))
+    since = updated_since(User)
+    if since is None:
+        return {"error": "Bad request"}, 400
+    conditions.extend(since)
+    args = serializer_args()
+    query = sa.select(User).options(*loaders.profile(User, **args))
     if conditions:
-        users = db.session.scalars(sa.select(User).where(*conditions)).all()
-    else:
-        users = db.session.scalars(sa.select(User)).all()
-    users = [user.serialize for user in users]
-    return jsonify(users), 200
+        query = query.where(*conditions)
+    users, next_cursor = paginate(query, User)
+    return conditional_page(users, next_cursor, args)
 
 
 # create [auth, admin]
@@ -41,10 +147,13 @@ def user_create():
         user.deserialize(data, new_user=True)
         db.session.add(user)
         db.session.commit()
-        sentry_sdk.capture_message(
-            f"{token_auth.current_user().fullname} created a new user: {user.fullname}"
+        audit(
+            "user.create",
+            user,
+            f"{token_auth.current_user().fullname} created a new user: {user.fullname}",
+            audit_created(user),
         )
-        return user.serialize, 201
+        return user.serialize(**serializer_args()), 201
     except AssertionError as e:
         return {"error": f"{e}"}, 400
 
@@ -58,11 +167,14 @@ def user_update(id):
     user = db.get_or_404(User, id)
     # Return one User
     if request.method == "GET":
-        return user.serialize, 200
+        return conditional_show(user, serializer_args())
     # Update a User
     elif request.method == "PUT":
         data = request.get_json()
         allowed_fields = ["fullname", "email", "phone", "role", "password"]
+        diff = audit_diff(user, data, ["fullname", "email", "phone", "role"])
+        if "password" in data:
+            diff["password"] = ["***", "***"]
         for field in allowed_fields:
             if field in data:
                 if field == "password":
@@ -70,14 +182,29 @@ def user_update(id):
                 else:
                     setattr(user, field, data[field])
         db.session.commit()
-        sentry_sdk.capture_message(
-            f"{token_auth.current_user().fullname} updated a user: {user.fullname}"
+        if "role" in diff or "password" in diff:
+            revoke_tokens(user.id)
+        else:
+            token_cache.invalidate_user(user.id)
+        audit(
+            "user.update",
+            user,
+            f"{token_auth.current_user().fullname} updated a user: {user.fullname}",
+            diff,
         )
-        return user.serialize, 200
+        return user.serialize(**serializer_args()), 200
     # Delete a User
     elif request.method == "DELETE":
+        diff = audit_deleted(user)
         db.session.delete(user)
         db.session.commit()
+        revoke_tokens(user.id)
+        audit(
+            "user.delete",
+            user,
+            f"{token_auth.current_user().fullname} removed a user: {user.fullname}",
+            diff,
+        )
         return {"message": "User removed"}, 200
 
 
@@ -91,9 +218,15 @@ def user_update(id):
 def client_index():
     # Return all clients
     if request.method == "GET":
-        clients = db.session.scalars(sa.select(Client).join(Client.sales_contact)).all()
-        clients = [client.serialize for client in clients]
-        return jsonify(clients)
+        since = updated_since(Client)
+        if since is None:
+            return {"error": "Bad request"}, 400
+        args = serializer_args()
+        query = sa.select(Client).options(*loaders.profile(Client, **args))
+        if since:
+            query = query.where(*since)
+        clients, next_cursor = paginate(query, Client)
+        return conditional_page(clients, next_cursor, args)
     # Create a Client
     elif request.method == "POST":
         author = token_auth.current_user()
@@ -111,12 +244,35 @@ def client_index():
             ):
                 return {"error": "A client with that email already exists"}, 400
             client = Client()
-            data["sales_contact"] = author
+            data["sales_contact_id"] = author.id
             client.deserialize(data)
             db.session.add(client)
             db.session.commit()
+            audit(
+                "client.create",
+                client,
+                f"{author.fullname} created a new client: {client.fullname}",
+                audit_created(client),
+            )
+
+            return client.serialize(**serializer_args()), 201
+
 
-            return client.serialize, 201
+# bulk create [auth, sales]
+@bp.route("/clients/bulk", methods=["POST"])
+@token_auth.login_required(role="sales")
+def client_bulk_create():
+    rows = bulk_rows()
+    if rows is None:
+        return {"error": "Bad request"}, 400
+    report = import_clients(rows, token_auth.current_user())
+    audit_log.publish(
+        token_auth.current_user(),
+        "client.import",
+        {"type": "client", "id": None},
+        f"{token_auth.current_user().fullname} imported {report['created']} clients",
+    )
+    return report, 200
 
 
 # show [auth]
@@ -124,7 +280,7 @@ def client_index():
 @token_auth.login_required()
 def client_show(id):
     client = db.get_or_404(Client, id)
-    return jsonify(client.serialize), 200
+    return conditional_show(client, serializer_args())
 
 
 # update [auth, author]
@@ -146,15 +302,29 @@ def client_update(id):
                 "company",
                 "sales_contact_id",
             ]
+            diff = audit_diff(client, data, allowed_fields)
             for field in allowed_fields:
                 if field in data:
                     setattr(client, field, data[field])
             db.session.commit()
-            return client.serialize, 200
+            audit(
+                "client.update",
+                client,
+                f"{user.fullname} updated a client: {client.fullname}",
+                diff,
+            )
+            return client.serialize(**serializer_args()), 200
         # Delete a User
         elif request.method == "DELETE":
+            diff = audit_deleted(client)
             db.session.delete(client)
             db.session.commit()
+            audit(
+                "client.delete",
+                client,
+                f"{user.fullname} removed a client: {client.fullname}",
+                diff,
+            )
             return {"message": "Client removed"}, 200
 
 
@@ -171,15 +341,28 @@ def contract_index():
     if filter_status and filter_status.upper() in ContractStatus._member_names_:
         conditions.append(Contract.status == ContractStatus(filter_status))
     if filter_remaining_amount:
-        conditions.append(Contract.remaining_amount > 0.0)
+        conditions.append(Contract.remaining_amount > 0)
+    since = updated_since(Contract)
+    if since is None:
+        return {"error": "Bad request"}, 400
+    conditions.extend(since)
+    args = serializer_args()
+    query = sa.select(Contract).options(*loaders.profile(Contract, **args))
     if conditions:
-        contracts = db.session.scalars(sa.select(Contract).where(*conditions)).all()
-    else:
-        contracts = db.session.scalars(sa.select(Contract)).all()
+        query = query.where(*conditions)
+    if request.args.get("stream"):
+        return stream_response(
+            query, Contract, lambda contract: contract.serialize(**args)
+        )
+    contracts, next_cursor = paginate(query, Contract)
+    return conditional_page(contracts, next_cursor, args)
 
-    contracts = [contract.serialize() for contract in contracts]
 
-    return jsonify(contracts), 200
+# stats [auth]
+@bp.route("/contracts/stats", methods=["GET"])
+@token_auth.login_required()
+def contract_stats_show():
+    return contract_stats(), 200
 
 
 # show [auth]
@@ -187,7 +370,7 @@ def contract_index():
 @token_auth.login_required()
 def contract_show(id):
     contract = db.get_or_404(Contract, id)
-    return jsonify(contract.serialize()), 200
+    return conditional_show(contract, serializer_args())
 
 
 # create [auth, admin]
@@ -210,8 +393,31 @@ def contract_create():
     )
     db.session.add(contract)
     db.session.commit()
+    audit(
+        "contract.create",
+        contract,
+        f"{token_auth.current_user().fullname} created a contract for: {client.fullname} (contract: {contract.id})",
+        audit_created(contract),
+    )
 
-    return contract.serialize(), 201
+    return contract.serialize(**serializer_args()), 201
+
+
+# bulk create [auth, admin]
+@bp.route("/contracts/bulk", methods=["POST"])
+@token_auth.login_required(role="admin")
+def contract_bulk_create():
+    rows = bulk_rows()
+    if rows is None:
+        return {"error": "Bad request"}, 400
+    report = import_contracts(rows)
+    audit_log.publish(
+        token_auth.current_user(),
+        "contract.import",
+        {"type": "contract", "id": None},
+        f"{token_auth.current_user().fullname} imported {report['created']} contracts",
+    )
+    return report, 200
 
 
 # update [auth, admin]
@@ -229,6 +435,7 @@ def contract_update(id):
             "remaining_amount",
             "status",
         ]
+        diff = audit_diff(contract, data, allowed_fields)
         for field in allowed_fields:
             if field in data:
                 # convert status string to enum if set
@@ -239,15 +446,32 @@ def contract_update(id):
                 setattr(contract, field, data[field])
         db.session.commit()
         if contract_signed:
-            sentry_sdk.capture_message(
-                f"{token_auth.current_user().fullname} signed a contract for: {contract.client.fullname} (contract: {contract.id})"
+            audit(
+                "contract.sign",
+                contract,
+                f"{token_auth.current_user().fullname} signed a contract for: {contract.client.fullname} (contract: {contract.id})",
+                diff,
+            )
+        else:
+            audit(
+                "contract.update",
+                contract,
+                f"{token_auth.current_user().fullname} updated a contract (contract: {contract.id})",
+                diff,
             )
 
-        return contract.serialize(), 200
+        return contract.serialize(**serializer_args()), 200
     # Delete a Contract
     if request.method == "DELETE":
+        diff = audit_deleted(contract)
         db.session.delete(contract)
         db.session.commit()
+        audit(
+            "contract.delete",
+            contract,
+            f"{token_auth.current_user().fullname} removed a contract (contract: {contract.id})",
+            diff,
+        )
         return {"message": "Contract removed"}, 200
 
 
@@ -265,13 +489,20 @@ def event_index():
             conditions.append(Event.support_contact_id == None)
         if filter_support == "current-user":
             conditions.append(Event.support_contact_id == token_auth.current_user().id)
+    since = updated_since(Event)
+    window = event_window()
+    if since is None or window is None:
+        return {"error": "Bad request"}, 400
+    conditions.extend(since)
+    conditions.extend(window)
+    args = serializer_args()
+    query = sa.select(Event).options(*loaders.profile(Event, **args))
     if conditions:
-        events = db.session.scalars(sa.select(Event).where(*conditions)).all()
-    else:
-        events = db.session.scalars(sa.select(Event)).all()
-    events = [event.serialize for event in events]
-
-    return jsonify(events), 200
+        query = query.where(*conditions)
+    if request.args.get("stream"):
+        return stream_response(query, Event, lambda event: event.serialize(**args))
+    events, next_cursor = paginate(query, Event)
+    return conditional_page(events, next_cursor, args)
 
 
 # show [auth]
@@ -279,7 +510,7 @@ def event_index():
 @token_auth.login_required()
 def event_show(id):
     event = db.get_or_404(Event, id)
-    return jsonify(event.serialize), 200
+    return conditional_show(event, serializer_args())
 
 
 # create [auth, sales] => must be client_author && contract_status == 'signed'
@@ -313,8 +544,31 @@ def event_create():
     event.deserialize(data)
     db.session.add(event)
     db.session.commit()
+    audit(
+        "event.create",
+        event,
+        f"{current_user.fullname} created an event: {event.title} (event: {event.id})",
+        audit_created(event),
+    )
 
-    return event.serialize, 201
+    return event.serialize(**serializer_args()), 201
+
+
+# bulk create [auth, sales] => same rules as create, checked per row
+@bp.route("/events/bulk", methods=["POST"])
+@token_auth.login_required(role="sales")
+def event_bulk_create():
+    rows = bulk_rows()
+    if rows is None:
+        return {"error": "Bad request"}, 400
+    report = import_events(rows, token_auth.current_user())
+    audit_log.publish(
+        token_auth.current_user(),
+        "event.import",
+        {"type": "event", "id": None},
+        f"{token_auth.current_user().fullname} imported {report['created']} events",
+    )
+    return report, 200
 
 
 # update [auth, admin]
@@ -331,9 +585,31 @@ def event_add_support(id):
             support_contact = db.get_or_404(User, data[field])
     if support_contact.role is not Role.SUPPORT:
         return {"error": "Bad request"}, 400
-    setattr(event, "support_contact_id", support_contact.id)
+    diff = audit_diff(event, {"support_contact_id": support_contact.id}, allowed_fields)
+    conflicts = assign_support(event, support_contact)
+    if conflicts:
+        return {
+            "error": "Support user is already booked on overlapping events",
+            "conflicts": conflicts,
+        }, 409
     db.session.commit()
-    return event.serialize, 200
+    audit(
+        "event.add_support",
+        event,
+        f"{token_auth.current_user().fullname} assigned {support_contact.fullname} to an event: {event.title} (event: {event.id})",
+        diff,
+    )
+    return event.serialize(**serializer_args()), 200
+
+
+# available supports [auth, admin]
+@bp.route("/events/<id>/available-supports", methods=["GET"])
+@token_auth.login_required(role="admin")
+def event_available_supports(id):
+    event = db.get_or_404(Event, id)
+    limit = request.args.get("limit", 5, type=int)
+    limit = max(1, min(limit, current_app.config["PAGINATION_MAX_LIMIT"]))
+    return available_supports(event, limit), 200
 
 
 # update [auth, sales]
@@ -355,11 +631,37 @@ def event_update(id):
         "notes",
     ]
 
+    for field in ["event_start", "event_end"]:
+        if field in data:
+            try:
+                data[field] = datetime.strptime(data[field], "%Y-%m-%d %H:%M:%S")
+            except (TypeError, ValueError):
+                return {"error": "Bad request"}, 400
+    # moving a staffed event must not double book its support user
+    support_contact_id = event.support_contact_id
+    rescheduled = "event_start" in data or "event_end" in data
+    if rescheduled:
+        lock_support(support_contact_id)
+
+    diff = audit_diff(event, data, allowed_fields)
     for field in allowed_fields:
         if field in data:
             setattr(event, field, data[field])
+    if rescheduled:
+        conflicts = booking_conflicts(event, support_contact_id)
+        if conflicts:
+            return {
+                "error": "Support user is already booked on overlapping events",
+                "conflicts": conflicts,
+            }, 409
     db.session.commit()
-    return event.serialize, 200
+    audit(
+        "event.update",
+        event,
+        f"{current_user.fullname} updated an event: {event.title} (event: {event.id})",
+        diff,
+    )
+    return event.serialize(**serializer_args()), 200
 
 
 # destroy [auth, author]
@@ -370,6 +672,85 @@ def event_destroy(id):
     current_user = token_auth.current_user()
     if current_user.id is not event.sales_contact_id:
         return {"error": "You are not authorized to do this"}, 403
+    diff = audit_deleted(event)
     db.session.delete(event)
     db.session.commit()
+    audit(
+        "event.delete",
+        event,
+        f"{current_user.fullname} removed an event: {event.title} (event: {event.id})",
+        diff,
+    )
     return {"message": "Event removed"}, 200
+
+
+# Change feed
+
+
+# index [auth, admin]
+@bp.route("/changes", methods=["GET"])
+@token_auth.login_required(role="admin")
+def change_index():
+    # inserts, updates and tombstones in id order, `?since=` a change cursor,
+    # the recent ones wait for the transactions that may still commit before
+    # them, see app/core/changes.py
+    lag = timedelta(seconds=current_app.config["CHANGES_SAFETY_LAG"])
+    settled = ChangeLog.created_at <= datetime.now(timezone.utc) - lag
+    changes, next_cursor = paginate(
+        sa.select(ChangeLog).where(settled), ChangeLog, cursor="since"
+    )
+    response = page_response(change_feed(changes), next_cursor, cursor="since")
+    if next_cursor is None:
+        # where to resume polling once new changes come in
+        since = changes[-1].id if changes else request.args.get("since", 0, type=int)
+        response.headers["X-Next-Cursor"] = str(since)
+    return response
+
+
+# Search views
+
+
+# search [auth]
+@bp.route("/search", methods=["GET"])
+@token_auth.login_required()
+def search_index():
+    limit = request.args.get("limit", 10, type=int)
+    limit = max(1, min(limit, current_app.config["PAGINATION_MAX_LIMIT"]))
+    results = search(request.args.get("q", ""), limit, **serializer_args())
+    if results is None:
+        return {"error": "Bad request"}, 400
+    return results, 200
+
+
+# Lookup views
+
+
+# index [auth, entity list]
+@bp.route("/lookup/<entity>", methods=["GET"])
+@token_auth.login_required()
+def lookup_index(entity):
+    if entity not in LOOKUPS:
+        return {"error": "Not found"}, 404
+    current_user = token_auth.current_user()
+    if not is_authorized(current_user.role.value, f"{entity}:list"):
+        return {"error": "You are not authorized to do this"}, 403
+    # the same filters as the list routes
+    conditions = []
+    filter_dept = request.args.get("dept")
+    if entity == "users" and filter_dept and filter_dept.upper() in Role._member_names_:
+        conditions.append(User.role == Role(filter_dept))
+    filter_status = request.args.get("status")
+    if (
+        entity == "contracts"
+        and filter_status
+        and filter_status.upper() in ContractStatus._member_names_
+    ):
+        conditions.append(Contract.status == ContractStatus(filter_status))
+    filter_support = request.args.get("support")
+    if entity == "events" and filter_support == "none":
+        conditions.append(Event.support_contact_id == None)
+    if entity == "events" and filter_support == "current-user":
+        conditions.append(Event.support_contact_id == current_user.id)
+    limit = request.args.get("limit", 10, type=int)
+    limit = max(1, min(limit, current_app.config["PAGINATION_MAX_LIMIT"]))
+    return lookup(entity, request.args.get("prefix", ""), limit, conditions), 200
@@ -0,0 +1,114 @@
+import re
+
+import sqlalchemy as sa
+from app import db
+from app.core import loaders
+from app.models import Client, Event
+
+# Full-text search over clients and events.
+# SQLite keeps one FTS5 table per model (rowid = entity id) in sync with
+# triggers on the model table, so Core inserts and SQL seeds are indexed too.
+# MySQL uses FULLTEXT indexes on the tables themselves, maintained by InnoDB.
+# Every query word is a prefix and all of them must match.
+
+# model -> (search table, columns, bm25 column weights)
+SEARCH_INDEXES = {
+    Client: ("client_search", ("fullname", "company", "email"), (10.0, 5.0, 1.0)),
+    Event: ("event_search", ("title", "location", "notes"), (10.0, 3.0, 1.0)),
+}
+SEARCH_TABLES = tuple(table for table, _, _ in SEARCH_INDEXES.values())
+WORD = re.compile(r"\w+")
+
+
+def search_triggers(model):
+    table, columns, _ = SEARCH_INDEXES[model]
+    base = model.__tablename__
+    insert = (
+        f"INSERT INTO {table} (rowid, {', '.join(columns)}) "
+        f"VALUES (new.id, {', '.join(f'new.{column}' for column in columns)});"
+    )
+    delete = f"DELETE FROM {table} WHERE rowid = old.id;"
+    return [
+        f"CREATE TRIGGER {table}_insert AFTER INSERT ON {base} BEGIN {insert} END",
+        f"CREATE TRIGGER {table}_delete AFTER DELETE ON {base} BEGIN {delete} END",
+        f"CREATE TRIGGER {table}_update AFTER UPDATE OF {', '.join(columns)} "
+        f"ON {base} BEGIN {delete} {insert} END",
+    ]
+
+
+for model, (table, columns, _) in SEARCH_INDEXES.items():
+    sa.event.listen(
+        model.__table__,
+        "after_create",
+        sa.DDL(
+            f"CREATE VIRTUAL TABLE {table} USING fts5({', '.join(columns)}, "
+            "tokenize='unicode61 remove_diacritics 2')"
+        ).execute_if(dialect="sqlite"),
+    )
+    for trigger in search_triggers(model):
+        sa.event.listen(
+            model.__table__,
+            "after_create",
+            sa.DDL(trigger).execute_if(dialect="sqlite"),
+        )
+    sa.event.listen(
+        model.__table__,
+        "after_drop",
+        sa.DDL(f"DROP TABLE IF EXISTS {table}").execute_if(dialect="sqlite"),
+    )
+    sa.event.listen(
+        model.__table__,
+        "after_create",
+        sa.DDL(
+            f"CREATE FULLTEXT INDEX ix_{table} ON {model.__tablename__} "
+            f"({', '.join(columns)})"
+        ).execute_if(dialect="mysql"),
+    )
+
+
+def is_search_object(name):
+    # FTS5 tables with their shadow tables and triggers and the FULLTEXT
+    # indexes live outside the metadata, autogenerate must not try to drop them
+    return any(
+        name.startswith(table) or name == f"ix_{table}" for table in SEARCH_TABLES
+    )
+
+
+def ranked_ids(model, words, limit):
+    # [(id, score)], best match first
+    table, columns, weights = SEARCH_INDEXES[model]
+    if db.engine.dialect.name == "sqlite":
+        query = " ".join(f'"{word}"*' for word in words)
+        # bm25 is lower for better matches
+        statement = sa.text(
+            f"SELECT rowid, -bm25({table}, {', '.join(map(str, weights))}) AS score "
+            f"FROM {table} WHERE {table} MATCH :query ORDER BY score DESC LIMIT :limit"
+        )
+    else:
+        query = " ".join(f"+{word}*" for word in words)
+        match = f"MATCH ({', '.join(columns)}) AGAINST (:query IN BOOLEAN MODE)"
+        statement = sa.text(
+            f"SELECT id, {match} AS score FROM {model.__tablename__} "
+            f"WHERE {match} ORDER BY score DESC LIMIT :limit"
+        )
+    return db.session.execute(statement, {"query": query, "limit": limit}).all()
+
+
+def search(text, limit, **serializer_args):
+    # {"clients": [...], "events": [...]}, None without any word to look for
+    words = WORD.findall(text)
+    if not words:
+        return None
+    results = {}
+    for model, key in [(Client, "clients"), (Event, "events")]:
+        scores = dict(ranked_ids(model, words, limit))
+        rows = db.session.scalars(
+            sa.select(model)
+            .where(model.id.in_(scores))
+            .options(*loaders.profile(model, **serializer_args))
+        )
+        results[key] = [
+            {**row.serialize(**serializer_args), "score": round(scores[row.id], 3)}
+            for row in sorted(rows, key=lambda row: -scores[row.id])
+        ]
+    return results
@@ -0,0 +1,57 @@
+import sqlalchemy as sa
+from app import db
+from app.models import Client, Contract, ContractStatus, User
+
+# Contract finance aggregates, each computed by a single GROUP BY query.
+
+
+def amount(value):
+    return round(value or 0.0, 2)
+
+
+def contract_stats():
+    count = sa.func.count(Contract.id)
+    total_amount = sa.func.sum(Contract.total_amount)
+    remaining_amount = sa.func.sum(Contract.remaining_amount)
+
+    totals = db.session.execute(sa.select(count, total_amount, remaining_amount)).one()
+    by_status = {
+        status.value: {"count": 0, "total_amount": 0.0, "remaining_amount": 0.0}
+        for status in ContractStatus
+    }
+    for status, status_count, status_total, status_remaining in db.session.execute(
+        sa.select(Contract.status, count, total_amount, remaining_amount).group_by(
+            Contract.status
+        )
+    ):
+        by_status[status.value] = {
+            "count": status_count,
+            "total_amount": amount(status_total),
+            "remaining_amount": amount(status_remaining),
+        }
+
+    def remaining_by(model, foreign_key):
+        rows = db.session.execute(
+            sa.select(model.id, model.fullname, count, remaining_amount)
+            .join(Contract, foreign_key == model.id)
+            .group_by(model.id, model.fullname)
+            .order_by(remaining_amount.desc(), model.id)
+        )
+        return [
+            {
+                "id": id,
+                "fullname": fullname,
+                "count": row_count,
+                "remaining_amount": amount(row_remaining),
+            }
+            for id, fullname, row_count, row_remaining in rows
+        ]
+
+    return {
+        "count": totals[0],
+        "total_amount": amount(totals[1]),
+        "remaining_amount": amount(totals[2]),
+        "by_status": by_status,
+        "by_sales_contact": remaining_by(User, Contract.sales_contact_id),
+        "by_client": remaining_by(Client, Contract.client_id),
+    }
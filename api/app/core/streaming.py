@@ -0,0 +1,26 @@
+from app import db
+from flask import Response, current_app, request, stream_with_context
+
+# Streaming mode for list routes: `?stream=true`.
+# Rows are read from a server-side cursor in batches of STREAM_BATCH_SIZE and the
+# JSON array is written element by element, so memory does not grow with the
+# number of rows exported.
+
+
+def stream_response(query, model, serialize):
+    after = request.args.get("after", type=int)
+    if after is not None:
+        query = query.where(model.id > after)
+    query = query.order_by(model.id).execution_options(
+        yield_per=current_app.config["STREAM_BATCH_SIZE"]
+    )
+
+    def generate():
+        yield "["
+        for index, row in enumerate(db.session.scalars(query)):
+            if index:
+                yield ","
+            yield current_app.json.dumps(serialize(row))
+        yield "]"
+
+    return Response(stream_with_context(generate()), mimetype="application/json")
@@ -5,6 +5,8 @@ from typing import Optional
 
 import sqlalchemy as sa
 from app import db
+from flask import current_app
+from sqlalchemy.dialects import mysql
 from sqlalchemy.orm import (
     DeclarativeBase,
     Mapped,
@@ -43,6 +45,59 @@ def validate_phone_number(number):
     return number
 
 
+def parse_paths(value):
+    # "client.sales_contact,events" -> {"client": {"sales_contact": {}}, "events": {}}
+    tree = {}
+    for path in value.split(",") if value else []:
+        node = tree
+        for name in path.strip().split("."):
+            if name:
+                node = node.setdefault(name, {})
+    return tree
+
+
+def merge_paths(tree, other):
+    merged = dict(tree)
+    for name, subtree in other.items():
+        merged[name] = merge_paths(merged.get(name, {}), subtree)
+    return merged
+
+
+# columns that change without changing what the API serves
+IGNORED_COLUMNS = {"token", "token_expiration", "password", "version_id", "updated_at"}
+
+
+def is_updated(obj):
+    state = sa.inspect(obj)
+    return any(
+        state.attrs[key].history.has_changes()
+        for key in state.mapper.column_attrs.keys()
+        if key not in IGNORED_COLUMNS
+    )
+
+
+def serialize_relations(obj, data, relations, fields=None, expand=None):
+    # Related objects are flat (ids only) unless expanded, either through
+    # `expand` or by asking for one of their fields, e.g. `client.fullname`.
+    fields = fields or {}
+    expand = expand or {}
+    for name in relations:
+        if name not in expand and name not in fields:
+            continue
+        related = getattr(obj, name)
+        sub_fields = fields.get(name)
+        sub_expand = expand.get(name)
+        if related is None:
+            data[name] = None
+        elif isinstance(related, list):
+            data[name] = [item.serialize(sub_fields, sub_expand) for item in related]
+        else:
+            data[name] = related.serialize(sub_fields, sub_expand)
+    if fields:
+        data = {key: value for key, value in data.items() if key in fields}
+    return data
+
+
 sales_events = db.Table(
     "sales_events",
     db.Column("user_id", db.ForeignKey("user.id"), primary_key=True),
@@ -66,6 +121,16 @@ class User(db.Model):
     password: Mapped[Optional[str]] = mapped_column(sa.String(256))
     token: Mapped[Optional[str]] = mapped_column(sa.String(32), index=True, unique=True)
     token_expiration: Mapped[Optional[datetime]]
+    # only follows the serialized fields, see touch_user
+    updated_at: Mapped[datetime] = mapped_column(
+        default=lambda: datetime.now(timezone.utc),
+        server_default=sa.func.now(),
+        index=True,
+    )
+    # bumped when a served column changes, used for ETags, see bump_version
+    version_id: Mapped[int] = mapped_column(server_default="1")
+    # case insensitive prefix lookups, see app/core/lookup.py
+    __table_args__ = (sa.Index("ix_user_fullname_lower", sa.func.lower(fullname)),)
     clients: Mapped[Optional[List["Client"]]] = relationship(
         back_populates="sales_contact"
     )
@@ -73,22 +138,29 @@ class User(db.Model):
         back_populates="sales_contact"
     )
 
-    @property
-    def serialize(self):
-        return {
+    def serialize(self, fields=None, expand=None):
+        user = {
             "id": self.id,
             "fullname": self.fullname,
             "email": self.email,
             "phone": self.phone,
             "role": self.role.value,
         }
+        return serialize_relations(self, user, [], fields, expand)
 
     def set_password(self, password):
-        self.password = generate_password_hash(password)
+        self.password = generate_password_hash(
+            password, method=current_app.config["PASSWORD_HASH_METHOD"]
+        )
 
     def check_password(self, password):
         return check_password_hash(self.password, password)
 
+    def password_needs_rehash(self):
+        # the stored hash starts with its method, eg. "scrypt:32768:8:1$..."
+        method = self.password.split("$", 1)[0]
+        return method != current_app.config["PASSWORD_HASH_METHOD"]
+
     def get_token(self, expires_in=3600):
         now = datetime.now(timezone.utc)
         if self.token and self.token_expiration.replace(
@@ -128,13 +200,27 @@ class User(db.Model):
         return validate_phone_number(number)
 
 
+@sa.event.listens_for(User, "before_update")
+def touch_user(mapper, connection, user):
+    # logins rewrite the token and may rehash the password, neither is an
+    # update of the user for the API consumers
+    state = sa.inspect(user)
+    if any(
+        state.attrs[field].history.has_changes()
+        for field in ["fullname", "email", "phone", "role"]
+    ):
+        user.updated_at = datetime.now(timezone.utc)
+
+
 class Client(db.Model):
     id: Mapped[int] = mapped_column(primary_key=True)
     fullname: Mapped[str] = mapped_column(sa.String(64), index=True, unique=True)
     email: Mapped[str] = mapped_column(sa.String(120), index=True, unique=True)
     phone: Mapped[str] = mapped_column(sa.String(12))
     company: Mapped[str] = mapped_column(sa.String(120))
-    sales_contact_id: Mapped[int] = mapped_column(sa.Integer, sa.ForeignKey("user.id"))
+    sales_contact_id: Mapped[int] = mapped_column(
+        sa.Integer, sa.ForeignKey("user.id"), index=True
+    )
     sales_contact: Mapped["User"] = relationship(
         back_populates="clients", foreign_keys=[sales_contact_id]
     )
@@ -146,27 +232,37 @@ class Client(db.Model):
         default=lambda: datetime.now(timezone.utc)
     )
     updated_at: Mapped[datetime] = mapped_column(
-        default=lambda: datetime.now(timezone.utc)
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        index=True,
     )
+    # bumped when a served column changes, used for ETags, see bump_version
+    version_id: Mapped[int] = mapped_column(server_default="1")
+    # case insensitive prefix lookups, see app/core/lookup.py
+    __table_args__ = (sa.Index("ix_client_fullname_lower", sa.func.lower(fullname)),)
 
-    def get_sales_contact(self):
-        return self.sales_contact.serialize if self.sales_contact else None
-
-    @property
-    def serialize(self):
-        return {
+    def serialize(self, fields=None, expand=None):
+        client = {
             "id": self.id,
             "fullname": self.fullname,
             "email": self.email,
             "phone": self.phone,
             "company": self.company,
-            "sales_contact": self.get_sales_contact(),
+            "sales_contact_id": self.sales_contact_id,
             "created_at": self.created_at,
             "updated_at": self.updated_at,
         }
+        return serialize_relations(self, client, ["sales_contact"], fields, expand)
 
     def deserialize(self, data):
-        for field in ["fullname", "email", "phone", "company", "sales_contact"]:
+        for field in [
+            "fullname",
+            "email",
+            "phone",
+            "company",
+            "sales_contact",
+            "sales_contact_id",
+        ]:
             if field in data:
                 setattr(self, field, data[field])
 
@@ -185,52 +281,64 @@ class Contract(db.Model):
         super().__init__(*args, **kwargs)
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    client_id: Mapped[int] = mapped_column(sa.Integer, sa.ForeignKey("client.id"))
+    client_id: Mapped[int] = mapped_column(
+        sa.Integer, sa.ForeignKey("client.id"), index=True
+    )
     client: Mapped["Client"] = relationship(back_populates="contracts")
-    sales_contact_id: Mapped[int] = mapped_column(sa.Integer, sa.ForeignKey("user.id"))
+    sales_contact_id: Mapped[int] = mapped_column(
+        sa.Integer, sa.ForeignKey("user.id"), index=True
+    )
     sales_contact: Mapped["User"] = relationship(
         back_populates="contracts", foreign_keys=[sales_contact_id]
     )
     total_amount: Mapped[float] = mapped_column(sa.Float)
     remaining_amount: Mapped[float] = mapped_column(sa.Float)
-    status: Mapped[ContractStatus] = mapped_column(default=ContractStatus.PENDING)
+    status: Mapped[ContractStatus] = mapped_column(
+        default=ContractStatus.PENDING, index=True
+    )
     created_at: Mapped[datetime] = mapped_column(
         default=lambda: datetime.now(timezone.utc)
     )
     updated_at: Mapped[datetime] = mapped_column(
-        default=lambda: datetime.now(timezone.utc)
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        index=True,
     )
+    # bumped when a served column changes, used for ETags, see bump_version
+    version_id: Mapped[int] = mapped_column(server_default="1")
     events: Mapped[Optional[List["Event"]]] = relationship(back_populates="contract")
 
+    # unpaid contracts, partial index where the backend supports it, MySQL
+    # would build a plain copy of ix_contract_status (see the migration)
+    __table_args__ = (
+        sa.Index(
+            "ix_contract_unpaid",
+            "status",
+            sqlite_where=sa.text("remaining_amount > 0"),
+            postgresql_where=sa.text("remaining_amount > 0"),
+        ).ddl_if(dialect=("sqlite", "postgresql")),
+    )
+
     @validates("total_amount")
     def set_remaining_amount(self, _, total_amount):
         if self.remaining_amount is None:
             self.remaining_amount = total_amount
         return total_amount
 
-    def get_client(self):
-        return self.client.serialize if self.client else None
-
-    def get_sales_contact(self):
-        return self.sales_contact.serialize if self.sales_contact else None
-
-    def get_events(self):
-        return [event.serialize for event in self.events] if self.events else []
-
-    def serialize(self, events=True):
+    def serialize(self, fields=None, expand=None):
         contract = {
             "id": self.id,
-            "client": self.get_client(),
-            "sales_contact": self.get_sales_contact(),
+            "client_id": self.client_id,
+            "sales_contact_id": self.sales_contact_id,
             "total_amount": self.total_amount,
             "remaining_amount": self.remaining_amount,
             "status": self.status.value,
             "created_at": self.created_at,
             "updated_at": self.updated_at,
         }
-        if events:
-            contract["events"] = self.get_events()
-        return contract
+        return serialize_relations(
+            self, contract, ["client", "sales_contact", "events"], fields, expand
+        )
 
     def deserialize(self, data):
         for field in ["client_id", "sales_contact_id", "total_amount"]:
@@ -242,13 +350,19 @@ class Event(db.Model):
     __tablename__ = "event"
     id: Mapped[int] = mapped_column(primary_key=True)
     title: Mapped[str] = mapped_column(sa.String(120))
-    contract_id: Mapped[int] = mapped_column(sa.Integer, sa.ForeignKey("contract.id"))
+    contract_id: Mapped[int] = mapped_column(
+        sa.Integer, sa.ForeignKey("contract.id"), index=True
+    )
     contract: Mapped["Contract"] = relationship(back_populates="events")
-    client_id: Mapped[int] = mapped_column(sa.Integer, sa.ForeignKey("client.id"))
+    client_id: Mapped[int] = mapped_column(
+        sa.Integer, sa.ForeignKey("client.id"), index=True
+    )
     client: Mapped["Client"] = relationship(
         back_populates="events", foreign_keys=[client_id]
     )
-    sales_contact_id: Mapped[int] = mapped_column(sa.Integer, sa.ForeignKey("user.id"))
+    sales_contact_id: Mapped[int] = mapped_column(
+        sa.Integer, sa.ForeignKey("user.id"), index=True
+    )
     sales_contact: Mapped["User"] = relationship(
         "User",
         foreign_keys=[sales_contact_id],
@@ -271,31 +385,35 @@ class Event(db.Model):
         default=lambda: datetime.now(timezone.utc)
     )
     updated_at: Mapped[datetime] = mapped_column(
-        default=lambda: datetime.now(timezone.utc)
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        index=True,
+    )
+    # bumped when a served column changes, used for ETags, see bump_version
+    version_id: Mapped[int] = mapped_column(server_default="1")
+    # calendar windows seek on the end date first so that past events,
+    # which ended before the window, are never read
+    __table_args__ = (
+        sa.Index("ix_event_schedule", "event_end", "event_start"),
+        sa.Index("ix_event_title_lower", sa.func.lower(title)),
+        # also serves the support_contact_id lookups
+        sa.Index(
+            "ix_event_support_schedule",
+            "support_contact_id",
+            "event_end",
+            "event_start",
+        ),
     )
 
-    def get_contract(self):
-        return self.contract.serialize(events=False) if self.contract else None
-
-    def get_client(self):
-        return self.client.serialize if self.client else None
-
-    def get_sales_contact(self):
-        return self.sales_contact.serialize if self.sales_contact else None
-
-    def get_support_contact(self):
-        return self.support_contact.serialize if self.support_contact else None
-
-    @property
-    def serialize(self):
+    def serialize(self, fields=None, expand=None):
         date_format = "%Y-%m-%d %H:%M:%S"
-        return {
+        event = {
             "id": self.id,
             "title": self.title,
-            "contract": self.get_contract(),
-            "client": self.get_client(),
-            "sales_contact": self.get_sales_contact(),
-            "support_contact": self.get_support_contact(),
+            "contract_id": self.contract_id,
+            "client_id": self.client_id,
+            "sales_contact_id": self.sales_contact_id,
+            "support_contact_id": self.support_contact_id,
             "event_start": datetime.strftime(self.event_start, date_format),
             "event_end": datetime.strftime(self.event_end, date_format),
             "location": self.location,
@@ -304,6 +422,13 @@ class Event(db.Model):
             "created_at": self.created_at,
             "updated_at": self.updated_at,
         }
+        return serialize_relations(
+            self,
+            event,
+            ["contract", "client", "sales_contact", "support_contact"],
+            fields,
+            expand,
+        )
 
     def deserialize(self, data):
         for field in [
@@ -322,3 +447,49 @@ class Event(db.Model):
                     date_format = "%Y-%m-%d %H:%M:%S"
                     data[field] = datetime.strptime(data[field], date_format)
                 setattr(self, field, data[field])
+
+
+@sa.event.listens_for(User, "before_update")
+@sa.event.listens_for(Client, "before_update")
+@sa.event.listens_for(Contract, "before_update")
+@sa.event.listens_for(Event, "before_update")
+def bump_version(mapper, connection, obj):
+    # A counter for the ETags rather than an optimistic lock, so that logins
+    # rewriting the token never conflict with a concurrent edit. Incremented
+    # in SQL, concurrent edits don't lose a bump.
+    if is_updated(obj):
+        obj.version_id = mapper.class_.version_id + 1
+
+
+class AuditEvent(db.Model):
+    __tablename__ = "audit_event"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(
+        default=lambda: datetime.now(timezone.utc)
+    )
+    actor_id: Mapped[Optional[int]] = mapped_column(sa.Integer)
+    action: Mapped[str] = mapped_column(sa.String(64), index=True)
+    entity_type: Mapped[str] = mapped_column(sa.String(32))
+    entity_id: Mapped[Optional[int]] = mapped_column(sa.Integer)
+    payload: Mapped[str] = mapped_column(sa.Text())
+
+
+class TokenRevocation(db.Model):
+    __tablename__ = "token_revocation"
+    user_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    # compared with the float issue time of the tokens, MySQL needs the
+    # microseconds spelled out
+    revoked_at: Mapped[datetime] = mapped_column(
+        sa.DateTime().with_variant(mysql.DATETIME(fsp=6), "mysql"), index=True
+    )
+
+
+class ChangeLog(db.Model):
+    __tablename__ = "change_log"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(
+        default=lambda: datetime.now(timezone.utc)
+    )
+    entity_type: Mapped[str] = mapped_column(sa.String(32))
+    entity_id: Mapped[int] = mapped_column(sa.Integer)
+    operation: Mapped[str] = mapped_column(sa.String(8))
@@ -0,0 +1,72 @@
+# Logins per second on POST /tokens for each password hashing policy.
+#
+#   python benchmarks/password_policies.py --seconds 3
+#   python benchmarks/password_policies.py --policy pbkdf2:sha256:600000
+import argparse
+import base64
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import TestConfig  # noqa: E402
+from app import create_app, db  # noqa: E402
+from app.models import Role, User  # noqa: E402
+
+POLICIES = [
+    "scrypt:32768:8:1",
+    "scrypt:16384:8:1",
+    "pbkdf2:sha256:600000",
+    "pbkdf2:sha256:260000",
+]
+
+
+def make_config(policy):
+    class BenchConfig(TestConfig):
+        PASSWORD_HASH_METHOD = policy
+
+    return BenchConfig
+
+
+def run(policy, seconds):
+    app = create_app(config_class=make_config(policy))
+    with app.app_context():
+        db.create_all()
+        user = User(
+            fullname="Bench User",
+            email="bench@test.com",
+            phone="0123456789",
+            role=Role.SALES,
+        )
+        user.set_password("test")
+        db.session.add(user)
+        db.session.commit()
+
+        client = app.test_client()
+        credentials = base64.b64encode(b"bench@test.com:test").decode("ascii")
+        headers = {"Authorization": f"Basic {credentials}"}
+        logins = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            response = client.post("/tokens", headers=headers)
+            assert response.status_code == 200
+            logins += 1
+        elapsed = time.perf_counter() - start
+        db.drop_all()
+    print(f"{policy:<24} {logins:>8} {logins / elapsed:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--policy", action="append")
+    args = parser.parse_args()
+
+    print(f"{'policy':<24} {'logins':>8} {'logins/s':>12}")
+    for policy in args.policy or POLICIES:
+        run(policy, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
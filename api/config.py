@@ -5,13 +5,85 @@ from dotenv import load_dotenv
 basedir = os.path.abspath(os.path.dirname(__file__))
 load_dotenv(os.path.join(basedir, ".env"))
 
+# Engine pool profiles, picked with DATABASE_POOL_PROFILE. They only apply to
+# server databases (MySQL), SQLite is tuned through SQLITE_PRAGMAS instead.
+ENGINE_PROFILES = {
+    "small": {"pool_size": 2, "max_overflow": 2},
+    "default": {"pool_size": 5, "max_overflow": 10},
+    "large": {"pool_size": 20, "max_overflow": 20},
+}
+
+
+def engine_options(uri, profile):
+    if uri.startswith("sqlite"):
+        return {}
+    options = {
+        **ENGINE_PROFILES[profile],
+        "pool_pre_ping": os.environ.get("DATABASE_POOL_PRE_PING", "true") == "true",
+        "pool_recycle": int(os.environ.get("DATABASE_POOL_RECYCLE", 1800)),
+        "pool_timeout": int(os.environ.get("DATABASE_POOL_TIMEOUT", 30)),
+        "isolation_level": os.environ.get("DATABASE_ISOLATION_LEVEL", "READ COMMITTED"),
+    }
+    if uri.startswith("mysql"):
+        # server side statement timeout and client side socket timeouts
+        timeout = int(os.environ.get("DATABASE_STATEMENT_TIMEOUT", 30))
+        options["connect_args"] = {
+            "read_timeout": timeout,
+            "write_timeout": timeout,
+            "init_command": f"SET SESSION max_execution_time={timeout * 1000}",
+        }
+    return options
+
+
+# public, only fit for development and the tests
+DEFAULT_SECRET_KEY = "the-testing-key"
+
 
 class Config:
-    SECRET_KEY = os.environ.get("SECRET_KEY") or "the-testing-key"
+    SECRET_KEY = os.environ.get("SECRET_KEY") or DEFAULT_SECRET_KEY
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL", "sqlite:///app.db")
+    DATABASE_POOL_PROFILE = os.environ.get("DATABASE_POOL_PROFILE", "default")
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(
+        SQLALCHEMY_DATABASE_URI, DATABASE_POOL_PROFILE
+    )
+    SQLITE_PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "cache_size": -16000,
+    }
+    PAGINATION_DEFAULT_LIMIT = int(os.environ.get("PAGINATION_DEFAULT_LIMIT", 100))
+    PAGINATION_MAX_LIMIT = int(os.environ.get("PAGINATION_MAX_LIMIT", 1000))
+    STREAM_BATCH_SIZE = int(os.environ.get("STREAM_BATCH_SIZE", 500))
+    BULK_CHUNK_SIZE = int(os.environ.get("BULK_CHUNK_SIZE", 500))
+    BULK_MAX_ROWS = int(os.environ.get("BULK_MAX_ROWS", 10000))
+    # seconds before a change is served by /changes, longer than any write
+    # transaction so that a lower cursor can't commit after a higher one
+    CHANGES_SAFETY_LAG = int(os.environ.get("CHANGES_SAFETY_LAG", 10))
+    AUDIT_SINKS = os.environ.get("AUDIT_SINKS", "sentry,table").split(",")
+    AUDIT_SENTRY_ACTIONS = ["user.create", "user.update", "contract.sign"]
+    AUDIT_JSONL_PATH = os.environ.get(
+        "AUDIT_JSONL_PATH", os.path.join(basedir, "audit.jsonl")
+    )
+    AUDIT_QUEUE_SIZE = int(os.environ.get("AUDIT_QUEUE_SIZE", 10000))
+    AUDIT_BATCH_SIZE = int(os.environ.get("AUDIT_BATCH_SIZE", 100))
+    # werkzeug hash method with every parameter, eg. "pbkdf2:sha256:600000"
+    PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    LOGIN_MAX_ATTEMPTS = int(os.environ.get("LOGIN_MAX_ATTEMPTS", 5))
+    LOGIN_WINDOW = int(os.environ.get("LOGIN_WINDOW", 300))
+    # "database" keeps the token on the user row, "signed" issues stateless
+    # signed tokens checked against an in-memory revocation list
+    TOKEN_MODE = os.environ.get("TOKEN_MODE", "database")
+    TOKEN_EXPIRES_IN = int(os.environ.get("TOKEN_EXPIRES_IN", 3600))
+    TOKEN_REVOCATION_REFRESH = int(os.environ.get("TOKEN_REVOCATION_REFRESH", 30))
+    TOKEN_CACHE_SIZE = int(os.environ.get("TOKEN_CACHE_SIZE", 1024))
+    TOKEN_CACHE_TTL = int(os.environ.get("TOKEN_CACHE_TTL", 300))
 
 
 class TestConfig(Config):
     TESTING = True
     SECRET_KEY = "the-testing-key"
     SQLALCHEMY_DATABASE_URI = "sqlite://"
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    AUDIT_SINKS = []
+    CHANGES_SAFETY_LAG = 0
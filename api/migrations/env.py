@@ -45,6 +45,24 @@ target_db = current_app.extensions['migrate'].db
 # ... etc.
 
 
+def include_name(name, type_, parent_names):
+    # the full-text search tables and indexes are managed by hand
+    from app.core.search import is_search_object
+
+    return name is None or not is_search_object(name)
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    # indexes declared with ddl_if only exist on the dialects they name
+    ddl_if = getattr(object, '_ddl_if', None)
+    if type_ == 'index' and not reflected and ddl_if and ddl_if.dialect:
+        dialects = ddl_if.dialect
+        if isinstance(dialects, str):
+            dialects = (dialects,)
+        return context.get_context().dialect.name in dialects
+    return True
+
+
 def get_metadata():
     if hasattr(target_db, 'metadatas'):
         return target_db.metadatas[None]
@@ -100,6 +118,8 @@ def run_migrations_online():
         context.configure(
             connection=connection,
             target_metadata=get_metadata(),
+            include_name=include_name,
+            include_object=include_object,
             **conf_args
         )
 
@@ -0,0 +1,42 @@
+"""add full text search
+
+Revision ID: b9d4e7f2a358
+Revises: a8c3d6e1f247
+Create Date: 2026-10-18 17:48:13.662981
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9d4e7f2a358'
+down_revision = 'a8c3d6e1f247'
+branch_labels = None
+depends_on = None
+
+# table -> (search table, columns), see app/core/search.py
+SEARCH_INDEXES = {
+    'client': ('client_search', ('fullname', 'company', 'email')),
+    'event': ('event_search', ('title', 'location', 'notes')),
+}
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    for table, (search_table, columns) in SEARCH_INDEXES.items():
+        if dialect == 'sqlite':
+            op.execute(f"CREATE VIRTUAL TABLE {search_table} USING fts5({', '.join(columns)}, "
+                       "tokenize='unicode61 remove_diacritics 2')")
+            op.execute(f"INSERT INTO {search_table} (rowid, {', '.join(columns)}) "
+                       f"SELECT id, {', '.join(columns)} FROM {table}")
+        elif dialect == 'mysql':
+            op.execute(f"CREATE FULLTEXT INDEX ix_{search_table} ON {table} ({', '.join(columns)})")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    for table, (search_table, columns) in SEARCH_INDEXES.items():
+        if dialect == 'sqlite':
+            op.execute(f"DROP TABLE {search_table}")
+        elif dialect == 'mysql':
+            op.drop_index(f'ix_{search_table}', table_name=table)
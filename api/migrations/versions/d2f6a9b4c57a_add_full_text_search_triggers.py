@@ -0,0 +1,48 @@
+"""add full text search triggers
+
+Revision ID: d2f6a9b4c57a
+Revises: c1e5f8a3b469
+Create Date: 2026-10-18 19:02:47.315208
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2f6a9b4c57a'
+down_revision = 'c1e5f8a3b469'
+branch_labels = None
+depends_on = None
+
+# table -> (search table, columns), see app/core/search.py
+SEARCH_INDEXES = {
+    'client': ('client_search', ('fullname', 'company', 'email')),
+    'event': ('event_search', ('title', 'location', 'notes')),
+}
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for table, (search_table, columns) in SEARCH_INDEXES.items():
+        insert = (f"INSERT INTO {search_table} (rowid, {', '.join(columns)}) "
+                  f"VALUES (new.id, {', '.join(f'new.{column}' for column in columns)});")
+        delete = f"DELETE FROM {search_table} WHERE rowid = old.id;"
+        op.execute(f"CREATE TRIGGER {search_table}_insert AFTER INSERT ON {table} "
+                   f"BEGIN {insert} END")
+        op.execute(f"CREATE TRIGGER {search_table}_delete AFTER DELETE ON {table} "
+                   f"BEGIN {delete} END")
+        op.execute(f"CREATE TRIGGER {search_table}_update AFTER UPDATE OF {', '.join(columns)} "
+                   f"ON {table} BEGIN {delete} {insert} END")
+        # rows written with SQL since the search tables were created
+        op.execute(f"DELETE FROM {search_table}")
+        op.execute(f"INSERT INTO {search_table} (rowid, {', '.join(columns)}) "
+                   f"SELECT id, {', '.join(columns)} FROM {table}")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for table, (search_table, columns) in SEARCH_INDEXES.items():
+        for operation in ('insert', 'delete', 'update'):
+            op.execute(f"DROP TRIGGER {search_table}_{operation}")
@@ -0,0 +1,105 @@
+import base64
+import json
+import pytest
+import sqlalchemy as sa
+from config import TestConfig
+from app import create_app, db
+from app.audit.log import audit_log, TableSink
+from app.models import AuditEvent, User
+from mock import users as mock_users
+
+
+@pytest.fixture()
+def app():
+    app = create_app(config_class=TestConfig)
+    with app.app_context():
+        db.create_all()
+        for user in mock_users:
+            db.session.add(
+                User(
+                    fullname=user[0],
+                    email=user[1],
+                    phone=user[2],
+                    role=user[3],
+                    password=user[4],
+                )
+            )
+            db.session.commit()
+        audit_log.add_sink(TableSink(app))
+        yield app
+        audit_log.flush()
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    client = app.test_client()
+    yield client
+
+
+def get_token(client, role):
+    username = None
+    password = "test"
+    if role == "admin":
+        username = "qsanterh@plala.or.jp"
+    if role == "sales":
+        username = "estaterfield0@nsw.gov.au"
+    if role == "support":
+        username = "gwealthall1@indiegogo.com"
+    if username is not None:
+        response = client.post(
+            "/tokens",
+            headers={
+                "Authorization": "Basic "
+                + base64.b64encode(bytes(username + ":" + password, "ascii")).decode(
+                    "ascii"
+                )
+            },
+        )
+        return response.json["token"]
+
+
+# Audit routes
+
+
+def test_update_user_is_audited(client):
+    token = get_token(client, "admin")
+    response = client.put(
+        "/users/2",
+        headers={"Authorization": f"Bearer {token}"},
+        data=json.dumps({"fullname": "Gare Updated"}),
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+    audit_log.flush()
+    audit_event = db.session.scalars(
+        sa.select(AuditEvent).where(AuditEvent.action == "user.update")
+    ).one()
+    assert audit_event.actor_id == 3
+    assert audit_event.entity_type == "user"
+    assert audit_event.entity_id == 2
+    assert json.loads(audit_event.payload)["diff"] == {
+        "fullname": ["Gare Wealthall", "Gare Updated"]
+    }
+
+
+# stats [auth, admin]
+def test_audit_stats(client):
+    token = get_token(client, "admin")
+    client.delete("/users/2", headers={"Authorization": f"Bearer {token}"})
+    audit_log.flush()
+    response = client.get("/audit/stats", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert response.json == {
+        "queue_depth": 0,
+        "published": 1,
+        "dropped": 0,
+        "failed": 0,
+    }
+
+
+def test_audit_stats_unauthorized(client):
+    token = get_token(client, "sales")
+    response = client.get("/audit/stats", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 403
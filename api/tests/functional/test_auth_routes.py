@@ -1,8 +1,13 @@
 import base64
+import json
 import pytest
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+from datetime import datetime, timezone
 from app import create_app, db
+from app.auth.tokens import token_revocations
 from config import TestConfig
-from app.models import User
+from app.models import TokenRevocation, User
 from mock import users as mock_users
 
 
@@ -47,3 +52,307 @@ def test_get_token(client):
     )
     assert response.status_code == 200
     assert response.json["token"] is not ""
+
+
+def login(client, username, password="test"):
+    return client.post(
+        "/tokens",
+        headers={
+            "Authorization": "Basic "
+            + base64.b64encode(bytes(f"{username}:{password}", "ascii")).decode("ascii")
+        },
+    )
+
+
+def get_role_token(client, username):
+    return login(client, username).json["token"]
+
+
+def test_authenticate_token_uses_cache(client):
+    token = get_role_token(client, "estaterfield0@nsw.gov.au")
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/tokens", headers=headers).status_code == 200
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    sa.event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = client.get("/tokens", headers=headers)
+    finally:
+        sa.event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+    assert response.status_code == 200
+    assert statements == []
+
+
+def test_token_cache_invalidated_on_user_delete(client):
+    sales_token = get_role_token(client, "estaterfield0@nsw.gov.au")
+    admin_token = get_role_token(client, "qsanterh@plala.or.jp")
+    headers = {"Authorization": f"Bearer {sales_token}"}
+    assert client.get("/tokens", headers=headers).status_code == 200
+    response = client.delete(
+        "/users/1", headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 200
+    assert client.get("/tokens", headers=headers).status_code == 401
+
+
+def test_token_cache_invalidated_on_role_change(client):
+    sales_token = get_role_token(client, "estaterfield0@nsw.gov.au")
+    admin_token = get_role_token(client, "qsanterh@plala.or.jp")
+    headers = {"Authorization": f"Bearer {sales_token}"}
+    assert client.get("/users", headers=headers).status_code == 200
+    response = client.put(
+        "/users/1",
+        headers={"Authorization": f"Bearer {admin_token}"},
+        data=json.dumps({"role": "SUPPORT"}),
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+    assert client.get("/users", headers=headers).status_code == 403
+
+
+def test_token_cache_stats(client):
+    admin_token = get_role_token(client, "qsanterh@plala.or.jp")
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    client.get("/tokens", headers=headers)
+    response = client.get("/tokens/cache", headers=headers)
+    assert response.status_code == 200
+    assert response.json["misses"] == 1
+    assert response.json["hits"] == 1
+
+
+def test_check_authorizations(client):
+    token = get_role_token(client, "gwealthall1@indiegogo.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.post(
+        "/authorizations", headers=headers, json={"target": "events:update"}
+    )
+    assert response.status_code == 200
+    response = client.post(
+        "/authorizations", headers=headers, json={"target": "users:create"}
+    )
+    assert response.status_code == 403
+
+
+def test_check_authorizations_batch(client):
+    token = get_role_token(client, "gwealthall1@indiegogo.com")
+    response = client.post(
+        "/authorizations/batch",
+        headers={"Authorization": f"Bearer {token}"},
+        json={"targets": ["events:update", "users:create"]},
+    )
+    assert response.status_code == 200
+    assert response.json["authorizations"] == {
+        "events:update": True,
+        "users:create": False,
+    }
+
+
+def test_list_authorizations(client):
+    token = get_role_token(client, "gwealthall1@indiegogo.com")
+    response = client.get(
+        "/authorizations", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200
+    assert response.json["role"] == "support"
+    assert "events:update" in response.json["permissions"]
+    assert "users:list" not in response.json["permissions"]
+    assert response.json["expiration"]
+
+
+def test_login_rehashes_password_to_current_policy(app, client):
+    app.config["PASSWORD_HASH_METHOD"] = "pbkdf2:sha256:1000"
+    assert login(client, "gwealthall1@indiegogo.com").status_code == 200
+    user = db.session.scalar(
+        sa.select(User).where(User.email == "gwealthall1@indiegogo.com")
+    )
+    assert user.password.startswith("pbkdf2:sha256:1000$")
+    assert login(client, "gwealthall1@indiegogo.com").status_code == 200
+
+
+def test_login_failure_does_not_rehash(app, client):
+    app.config["PASSWORD_HASH_METHOD"] = "pbkdf2:sha256:1000"
+    assert login(client, "gwealthall1@indiegogo.com", "wrong").status_code == 401
+    user = db.session.scalar(
+        sa.select(User).where(User.email == "gwealthall1@indiegogo.com")
+    )
+    assert user.password.startswith("scrypt:32768:8:1$")
+
+
+def test_login_rate_limited_per_account(client):
+    for _ in range(5):
+        response = login(client, "gwealthall1@indiegogo.com", "wrong")
+        assert response.status_code == 401
+    response = login(client, "gwealthall1@indiegogo.com")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+    assert login(client, "qsanterh@plala.or.jp").status_code == 200
+
+
+def test_login_rate_limit_ignores_email_case(client):
+    for email in ["GWealthall1@indiegogo.com", " gwealthall1@indiegogo.com"] * 3:
+        login(client, email, "wrong")
+    assert login(client, "gwealthall1@indiegogo.com").status_code == 429
+
+
+def test_successful_login_resets_rate_limit(client):
+    for _ in range(4):
+        login(client, "gwealthall1@indiegogo.com", "wrong")
+    assert login(client, "gwealthall1@indiegogo.com").status_code == 200
+    for _ in range(4):
+        login(client, "gwealthall1@indiegogo.com", "wrong")
+    assert login(client, "gwealthall1@indiegogo.com").status_code == 200
+
+
+def record_statements(request):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    sa.event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = request()
+    finally:
+        sa.event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+    return response, statements
+
+
+def test_signed_token_login_does_not_write(app, client):
+    app.config["TOKEN_MODE"] = "signed"
+    response, statements = record_statements(
+        lambda: login(client, "estaterfield0@nsw.gov.au")
+    )
+    assert response.status_code == 200
+    assert not [s for s in statements if s.startswith(("UPDATE", "INSERT"))]
+    user = db.session.scalar(
+        sa.select(User).where(User.email == "estaterfield0@nsw.gov.au")
+    )
+    assert user.token is None
+
+
+def test_signed_token_verification_does_not_read(app, client):
+    app.config["TOKEN_MODE"] = "signed"
+    token = get_role_token(client, "estaterfield0@nsw.gov.au")
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/tokens", headers=headers).status_code == 200
+    response, statements = record_statements(
+        lambda: client.get("/authorizations", headers=headers)
+    )
+    assert response.status_code == 200
+    assert response.json["role"] == "sales"
+    assert statements == []
+
+
+def test_signed_token_tampered(app, client):
+    app.config["TOKEN_MODE"] = "signed"
+    token = get_role_token(client, "estaterfield0@nsw.gov.au")
+    response = client.get("/tokens", headers={"Authorization": f"Bearer {token}x"})
+    assert response.status_code == 401
+
+
+def test_signed_token_revoked_on_role_change(app, client):
+    app.config["TOKEN_MODE"] = "signed"
+    admin_token = get_role_token(client, "qsanterh@plala.or.jp")
+    token = get_role_token(client, "estaterfield0@nsw.gov.au")
+    client.put(
+        "/users/1",
+        headers={"Authorization": f"Bearer {admin_token}"},
+        data=json.dumps({"role": "SUPPORT"}),
+        content_type="application/json",
+    )
+    response = client.get("/tokens", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 401
+    token = get_role_token(client, "estaterfield0@nsw.gov.au")
+    response = client.get(
+        "/authorizations", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.json["role"] == "support"
+
+
+def test_signed_token_revocations_are_reloaded(app, client):
+    app.config["TOKEN_MODE"] = "signed"
+    token = get_role_token(client, "estaterfield0@nsw.gov.au")
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/tokens", headers=headers).status_code == 200
+    # revoked by another worker, seen on the next reload of the list
+    db.session.add(TokenRevocation(user_id=1, revoked_at=datetime.now(timezone.utc)))
+    db.session.commit()
+    token_revocations.init_app(app)
+    assert client.get("/tokens", headers=headers).status_code == 401
+
+
+def test_revocation_reload_keeps_the_same_second(app, client):
+    app.config["TOKEN_MODE"] = "signed"
+    token = get_role_token(client, "estaterfield0@nsw.gov.au")
+    headers = {"Authorization": f"Bearer {token}"}
+    client.delete("/tokens", headers=headers)
+    # another worker loading the list from the table
+    token_revocations.init_app(app)
+    assert client.get("/tokens", headers=headers).status_code == 401
+    column = TokenRevocation.__table__.c.revoked_at
+    assert column.type.compile(dialect=mysql.dialect()) == "DATETIME(6)"
+
+
+# logout [auth]
+def test_logout_revokes_token(client):
+    token = get_role_token(client, "estaterfield0@nsw.gov.au")
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/tokens", headers=headers).status_code == 200
+    response = client.delete("/tokens", headers=headers)
+    assert response.status_code == 200
+    assert client.get("/tokens", headers=headers).status_code == 401
+    new_token = get_role_token(client, "estaterfield0@nsw.gov.au")
+    assert new_token != token
+    response = client.get("/tokens", headers={"Authorization": f"Bearer {new_token}"})
+    assert response.status_code == 200
+
+
+def test_logout_revokes_signed_token(app, client):
+    app.config["TOKEN_MODE"] = "signed"
+    token = get_role_token(client, "estaterfield0@nsw.gov.au")
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.delete("/tokens", headers=headers).status_code == 200
+    assert client.get("/tokens", headers=headers).status_code == 401
+
+
+def test_revocation_from_another_worker_skips_cache(app, client):
+    token = get_role_token(client, "estaterfield0@nsw.gov.au")
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/tokens", headers=headers).status_code == 200
+    # another worker logs the user out, this worker still has the token cached
+    user = db.session.get(User, 1)
+    user.token = None
+    db.session.add(TokenRevocation(user_id=1, revoked_at=datetime.now(timezone.utc)))
+    db.session.commit()
+    token_revocations.init_app(app)
+    assert client.get("/tokens", headers=headers).status_code == 401
+
+
+def test_cached_token_rechecked_after_revocation(app, client):
+    token = get_role_token(client, "estaterfield0@nsw.gov.au")
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/tokens", headers=headers).status_code == 200
+    # a role change elsewhere revokes the cache entry, not the token itself
+    db.session.add(TokenRevocation(user_id=1, revoked_at=datetime.now(timezone.utc)))
+    db.session.commit()
+    token_revocations.init_app(app)
+    assert client.get("/tokens", headers=headers).status_code == 200
+
+
+# revoke user tokens [auth, admin]
+def test_revoke_user_tokens(client):
+    admin_token = get_role_token(client, "qsanterh@plala.or.jp")
+    token = get_role_token(client, "estaterfield0@nsw.gov.au")
+    response = client.delete(
+        "/users/1/tokens", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 403
+    response = client.delete(
+        "/users/1/tokens", headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 200
+    response = client.get("/tokens", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 401
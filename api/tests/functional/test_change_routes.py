@@ -0,0 +1,214 @@
+import base64
+import json
+import pytest
+import sqlalchemy as sa
+from config import TestConfig
+from app import create_app, db
+from app.models import User, Client, Contract, ChangeLog
+from mock import (
+    users as mock_users,
+    clients as mock_clients,
+    contracts as mock_contracts,
+)
+
+
+@pytest.fixture()
+def app():
+    app = create_app(config_class=TestConfig)
+    with app.app_context():
+        db.create_all()
+        for user in mock_users:
+            db.session.add(
+                User(
+                    fullname=user[0],
+                    email=user[1],
+                    phone=user[2],
+                    role=user[3],
+                    password=user[4],
+                )
+            )
+            db.session.commit()
+        for client in mock_clients:
+            db.session.add(
+                Client(
+                    fullname=client[0],
+                    email=client[1],
+                    phone=client[2],
+                    company=client[3],
+                    sales_contact_id=client[4],
+                )
+            )
+            db.session.commit()
+        for contract in mock_contracts:
+            db.session.add(
+                Contract(
+                    client_id=contract[0],
+                    sales_contact_id=contract[1],
+                    total_amount=contract[2],
+                    remaining_amount=contract[3],
+                    status=contract[4],
+                )
+            )
+            db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    client = app.test_client()
+    yield client
+
+
+def get_token(client, role):
+    username = None
+    password = "test"
+    if role == "admin":
+        username = "qsanterh@plala.or.jp"
+    if role == "sales":
+        username = "estaterfield0@nsw.gov.au"
+    if role == "support":
+        username = "gwealthall1@indiegogo.com"
+    if username is not None:
+        response = client.post(
+            "/tokens",
+            headers={
+                "Authorization": "Basic "
+                + base64.b64encode(bytes(username + ":" + password, "ascii")).decode(
+                    "ascii"
+                )
+            },
+        )
+        return response.json["token"]
+
+
+# Change feed
+
+
+def last_cursor():
+    return db.session.scalar(sa.select(sa.func.max(ChangeLog.id)))
+
+
+# index [auth, admin]
+def test_changes_unauthorized(client):
+    token = get_token(client, "sales")
+    response = client.get("/changes", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 403
+
+
+def test_changes_follow_client_lifecycle(client):
+    admin_headers = {"Authorization": f"Bearer {get_token(client, 'admin')}"}
+    headers = {"Authorization": f"Bearer {get_token(client, 'sales')}"}
+    since = last_cursor()
+    response = client.post(
+        "/clients",
+        headers=headers,
+        data=json.dumps(
+            {
+                "fullname": "Test Client",
+                "email": "test@client.com",
+                "phone": "0123456789",
+                "company": "Test inc",
+            }
+        ),
+        content_type="application/json",
+    )
+    id = response.json["id"]
+    client.put(
+        f"/clients/{id}",
+        headers=headers,
+        data=json.dumps({"company": "Updated inc"}),
+        content_type="application/json",
+    )
+    client.delete(f"/clients/{id}", headers=headers)
+    response = client.get(f"/changes?since={since}", headers=admin_headers)
+    assert response.status_code == 200
+    changes = response.json
+    assert [(c["operation"], c["entity"], c["id"]) for c in changes] == [
+        ("insert", "client", id),
+        ("update", "client", id),
+        ("delete", "client", id),
+    ]
+    # the current state is served, the client is gone
+    assert [c["data"] for c in changes] == [None, None, None]
+    assert response.headers["X-Next-Cursor"] == str(changes[-1]["cursor"])
+    assert "Link" not in response.headers
+
+
+def test_changes_serve_current_state(client):
+    headers = {"Authorization": f"Bearer {get_token(client, 'admin')}"}
+    since = last_cursor()
+    client.put(
+        "/contracts/3",
+        headers=headers,
+        data=json.dumps({"status": "signed"}),
+        content_type="application/json",
+    )
+    response = client.get(f"/changes?since={since}", headers=headers)
+    assert len(response.json) == 1
+    assert response.json[0]["operation"] == "update"
+    assert response.json[0]["data"]["status"] == "signed"
+
+
+def test_login_is_not_a_change(client):
+    since = last_cursor()
+    token = get_token(client, "admin")
+    response = client.get(
+        f"/changes?since={since}", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.json == []
+    assert response.headers["X-Next-Cursor"] == str(since)
+
+
+def test_changes_paginated(client):
+    headers = {"Authorization": f"Bearer {get_token(client, 'admin')}"}
+    response = client.get("/changes?limit=3", headers=headers)
+    assert [c["cursor"] for c in response.json] == [1, 2, 3]
+    assert response.headers["X-Next-Cursor"] == "3"
+    assert "since=3" in response.headers["Link"]
+    response = client.get("/changes?limit=3&since=3", headers=headers)
+    assert [c["cursor"] for c in response.json] == [4, 5, 6]
+
+
+def test_bulk_imports_without_returning_are_changes(client, monkeypatch):
+    # MySQL has no RETURNING
+    monkeypatch.setattr(db.engine.dialect, "insert_returning", False)
+    monkeypatch.setattr(db.engine.dialect, "insert_executemany_returning", False)
+    test_bulk_imports_are_changes(client)
+
+
+def test_bulk_imports_are_changes(client):
+    headers = {"Authorization": f"Bearer {get_token(client, 'admin')}"}
+    since = last_cursor()
+    response = client.post(
+        "/contracts/bulk",
+        headers=headers,
+        data=json.dumps([{"client_id": 1, "total_amount": 10}] * 2),
+        content_type="application/json",
+    )
+    assert response.json["created"] == 2
+    response = client.get(f"/changes?since={since}", headers=headers)
+    ids = db.session.scalars(sa.select(Contract.id).order_by(Contract.id)).all()
+    assert [(c["operation"], c["entity"], c["id"]) for c in response.json] == [
+        ("insert", "contract", ids[-2]),
+        ("insert", "contract", ids[-1]),
+    ]
+
+
+def test_recent_changes_wait_for_the_safety_lag(app, client):
+    headers = {"Authorization": f"Bearer {get_token(client, 'admin')}"}
+    since = last_cursor()
+    client.put(
+        "/contracts/3",
+        headers=headers,
+        data=json.dumps({"status": "signed"}),
+        content_type="application/json",
+    )
+    app.config["CHANGES_SAFETY_LAG"] = 60
+    response = client.get(f"/changes?since={since}", headers=headers)
+    assert response.json == []
+    assert response.headers["X-Next-Cursor"] == str(since)
+    app.config["CHANGES_SAFETY_LAG"] = 0
+    response = client.get(f"/changes?since={since}", headers=headers)
+    assert [c["cursor"] for c in response.json] == [since + 1]
@@ -84,9 +84,21 @@ def test_list_clients(client):
     assert len(response.json) == 5
 
 
+def test_list_clients_paginated(client):
+    token = get_token(client, "sales")
+    response = client.get(
+        "/clients?limit=3&after=1", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200
+    assert [client["id"] for client in response.json] == [2, 3, 4]
+    assert response.headers["X-Next-Cursor"] == "4"
+
+
 def test_show_client(client):
     token = get_token(client, "support")
-    response = client.get("/clients/1", headers={"Authorization": f"Bearer {token}"})
+    response = client.get(
+        "/clients/1?expand=sales_contact", headers={"Authorization": f"Bearer {token}"}
+    )
     assert response.status_code == 200
     json_client = response.json
     assert json_client.get("fullname") == "Gilburt Scarf"
@@ -107,6 +119,71 @@ def test_show_client_unauth(client):
     assert response.status_code == 401
 
 
+def test_show_client_not_modified(client):
+    token = get_token(client, "sales")
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.get("/clients/1", headers=headers)
+    etag = response.headers["ETag"]
+    response = client.get(
+        "/clients/1", headers=dict(headers, **{"If-None-Match": etag})
+    )
+    assert response.status_code == 304
+    assert response.data == b""
+    client.put(
+        "/clients/1",
+        headers=headers,
+        data=json.dumps({"fullname": "Test update"}),
+        content_type="application/json",
+    )
+    response = client.get(
+        "/clients/1", headers=dict(headers, **{"If-None-Match": etag})
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json["fullname"] == "Test update"
+
+
+def test_show_client_etag_follows_expanded_relations(client):
+    token = get_token(client, "admin")
+    headers = {"Authorization": f"Bearer {token}"}
+    flat_etag = client.get("/clients/1", headers=headers).headers["ETag"]
+    etag = client.get("/clients/1?expand=sales_contact", headers=headers).headers[
+        "ETag"
+    ]
+    assert etag != flat_etag
+    client.put(
+        "/users/1",
+        headers=headers,
+        data=json.dumps({"phone": "0102030405"}),
+        content_type="application/json",
+    )
+    response = client.get(
+        "/clients/1?expand=sales_contact",
+        headers=dict(headers, **{"If-None-Match": etag}),
+    )
+    assert response.status_code == 200
+    assert response.json["sales_contact"]["phone"] == "0102030405"
+    response = client.get(
+        "/clients/1", headers=dict(headers, **{"If-None-Match": flat_etag})
+    )
+    assert response.status_code == 304
+
+
+def test_list_clients_not_modified(client):
+    token = get_token(client, "sales")
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.get("/clients?limit=1", headers=headers)
+    etag = response.headers["ETag"]
+    response = client.get(
+        "/clients?limit=1", headers=dict(headers, **{"If-None-Match": etag})
+    )
+    assert response.status_code == 304
+    response = client.get(
+        "/clients?limit=2", headers=dict(headers, **{"If-None-Match": etag})
+    )
+    assert response.status_code == 200
+
+
 # create [auth, sales]
 def test_create_client_with_authorization(client):
     token = get_token(client, "sales")
@@ -117,7 +194,7 @@ def test_create_client_with_authorization(client):
         "company": "Test company",
     }
     response = client.post(
-        "/clients",
+        "/clients?expand=sales_contact",
         headers={"Authorization": f"Bearer {token}"},
         data=json.dumps(new_client),
         content_type="application/json",
@@ -206,3 +283,50 @@ def test_destroy_client_unauthorized(client):
     assert response.status_code == 403
     clients = db.session.scalars(sa.select(Client)).all()
     assert len(clients) == 5
+
+
+# bulk create [auth, sales]
+def test_bulk_create_clients(client):
+    token = get_token(client, "sales")
+    rows = [
+        {
+            "fullname": f"Bulk Client {i}",
+            "email": f"bulk{i}@test.com",
+            "phone": "0123456789",
+            "company": "Bulk inc",
+        }
+        for i in range(1200)
+    ]
+    rows.append(dict(rows[0], fullname="Duplicate Email"))
+    rows.append(
+        {
+            "fullname": "Taken Email",
+            "email": "gscarf0@tuttocitta.it",
+            "phone": "0123456789",
+            "company": "Bulk inc",
+        }
+    )
+    rows.append({"fullname": "Missing Fields"})
+    response = client.post(
+        "/clients/bulk",
+        headers={"Authorization": f"Bearer {token}"},
+        data=json.dumps(rows),
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+    assert response.json["created"] == 1200
+    assert [error["row"] for error in response.json["errors"]] == [1200, 1201, 1202]
+    clients = db.session.scalars(sa.select(Client)).all()
+    assert len(clients) == 1205
+    assert clients[-1].sales_contact_id == 1
+
+
+def test_bulk_create_clients_unauthorized(client):
+    token = get_token(client, "admin")
+    response = client.post(
+        "/clients/bulk",
+        headers={"Authorization": f"Bearer {token}"},
+        data=json.dumps([{"fullname": "test"}]),
+        content_type="application/json",
+    )
+    assert response.status_code == 403
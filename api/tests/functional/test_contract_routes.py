@@ -2,6 +2,7 @@ import base64
 import json
 import pytest
 import sqlalchemy as sa
+from datetime import datetime, timezone
 from config import TestConfig
 from app import create_app, db
 from app.models import User, Client, Event, Contract, Role, ContractStatus
@@ -95,9 +96,40 @@ def test_contracts_list(client):
     assert len(response.json) == 5
 
 
+def test_contracts_list_paginated_with_filters(client):
+    token = get_token(client, "sales")
+    response = client.get(
+        "/contracts?status=pending&limit=2",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 200
+    assert [contract["id"] for contract in response.json] == [3, 4]
+    assert response.headers["X-Next-Cursor"] == "4"
+    next_url = response.headers["Link"].split(";")[0].strip("<>")
+    assert "status=pending" in next_url
+    response = client.get(next_url, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert [contract["id"] for contract in response.json] == [5]
+    assert "Link" not in response.headers
+
+
+def test_contracts_list_stream_with_filters(client):
+    token = get_token(client, "sales")
+    response = client.get(
+        "/contracts?status=signed&stream=true",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert [contract["id"] for contract in response.json] == [1, 2]
+
+
 def test_contract_show(client):
     token = get_token(client, "sales")
-    response = client.get("/contracts/1", headers={"Authorization": f"Bearer {token}"})
+    response = client.get(
+        "/contracts/1?expand=client,sales_contact",
+        headers={"Authorization": f"Bearer {token}"},
+    )
     assert response.status_code == 200
     json_contract = response.json
     client = json_contract.get("client")
@@ -114,6 +146,88 @@ def test_contract_show(client):
     assert json_contract.get("status") == ContractStatus.SIGNED.value
 
 
+def test_contracts_list_updated_since(client):
+    token = get_token(client, "admin")
+    headers = {"Authorization": f"Bearer {token}"}
+    since = datetime.now(timezone.utc)
+    response = client.put(
+        "/contracts/3",
+        headers=headers,
+        data=json.dumps({"status": "signed"}),
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+    contract = db.session.get(Contract, 3)
+    assert contract.updated_at.replace(tzinfo=timezone.utc) >= since
+    response = client.get(
+        "/contracts", query_string={"updated_since": since.isoformat()}, headers=headers
+    )
+    assert response.status_code == 200
+    assert [contract["id"] for contract in response.json] == [3]
+
+
+def test_contracts_list_updated_since_invalid(client):
+    token = get_token(client, "admin")
+    response = client.get(
+        "/contracts?updated_since=yesterday",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 400
+
+
+def test_contract_show_not_modified_since(client):
+    token = get_token(client, "admin")
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.get("/contracts/3", headers=headers)
+    last_modified = response.headers["Last-Modified"]
+    response = client.get(
+        "/contracts/3", headers=dict(headers, **{"If-Modified-Since": last_modified})
+    )
+    assert response.status_code == 304
+    response = client.get(
+        "/contracts/3?expand=client",
+        headers=dict(headers, **{"If-Modified-Since": last_modified}),
+    )
+    assert response.status_code == 200
+    assert "Last-Modified" not in response.headers
+
+
+# stats [auth]
+def test_contract_stats(client):
+    token = get_token(client, "sales")
+    response = client.get(
+        "/contracts/stats", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200
+    stats = response.json
+    contracts = db.session.scalars(sa.select(Contract)).all()
+    assert stats["count"] == 5
+    assert stats["total_amount"] == round(sum(c.total_amount for c in contracts), 2)
+    assert stats["remaining_amount"] == round(
+        sum(c.remaining_amount for c in contracts), 2
+    )
+    assert stats["by_status"]["signed"]["count"] == 2
+    assert stats["by_status"]["pending"]["count"] == 3
+    assert stats["by_status"]["signed"]["remaining_amount"] == round(
+        sum(c.remaining_amount for c in contracts if c.status == ContractStatus.SIGNED),
+        2,
+    )
+    assert [row["id"] for row in stats["by_sales_contact"]] == [1, 4]
+    assert stats["by_sales_contact"][0]["count"] == 4
+    by_client = {row["id"]: row for row in stats["by_client"]}
+    assert by_client[1]["count"] == 2
+    assert by_client[1]["remaining_amount"] == round(
+        sum(c.remaining_amount for c in contracts if c.client_id == 1), 2
+    )
+    remaining = [row["remaining_amount"] for row in stats["by_client"]]
+    assert remaining == sorted(remaining, reverse=True)
+
+
+def test_contract_stats_unauthenticated(client):
+    response = client.get("/contracts/stats")
+    assert response.status_code == 401
+
+
 # create [auth, admin]
 def test_contract_create(client):
     token = get_token(client, "admin")
@@ -122,7 +236,7 @@ def test_contract_create(client):
         "total_amount": 999.99,
     }
     response = client.post(
-        "/contracts",
+        "/contracts?expand=client,sales_contact",
         headers={"Authorization": f"Bearer {token}"},
         data=json.dumps(new_contract),
         content_type="application/json",
@@ -149,7 +263,7 @@ def test_update_contract(client):
     token = get_token(client, "admin")
     update_contract = {"status": "signed"}
     response = client.put(
-        "/contracts/3",
+        "/contracts/3?expand=client,sales_contact",
         headers={"Authorization": f"Bearer {token}"},
         data=json.dumps(update_contract),
         content_type="application/json",
@@ -175,7 +289,7 @@ def test_update_contract_amount(client):
     token = get_token(client, "admin")
     update_contract = {"remaining_amount": 0}
     response = client.put(
-        "/contracts/3",
+        "/contracts/3?expand=client,sales_contact",
         headers={"Authorization": f"Bearer {token}"},
         data=json.dumps(update_contract),
         content_type="application/json",
@@ -209,3 +323,29 @@ def test_destroy_contract(client):
     assert response.status_code == 200
     contracts = db.session.scalars(sa.select(Contract)).all()
     assert len(contracts) == 4
+
+
+# bulk create [auth, admin]
+def test_contract_bulk_create(client):
+    token = get_token(client, "admin")
+    rows = [
+        {"client_id": 4, "total_amount": 100},
+        {"client_id": "5", "total_amount": "250.5"},
+        {"client_id": 999, "total_amount": 100},
+        {"client_id": 1},
+    ]
+    response = client.post(
+        "/contracts/bulk",
+        headers={"Authorization": f"Bearer {token}"},
+        data=json.dumps(rows),
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+    assert response.json["created"] == 2
+    assert response.json["errors"] == [
+        {"row": 2, "error": "Client not found"},
+        {"row": 3, "error": "Missing fields: total_amount"},
+    ]
+    contract = db.session.scalars(sa.select(Contract).order_by(Contract.id)).all()[-1]
+    assert contract.remaining_amount == 250.5
+    assert contract.status == ContractStatus.PENDING
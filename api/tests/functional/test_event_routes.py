@@ -4,7 +4,6 @@ import pytest
 import sqlalchemy as sa
 from datetime import datetime
 
-from werkzeug.datastructures import headers
 from config import TestConfig
 from app import create_app, db
 from app.models import User, Client, Event, Contract, Role, ContractStatus
@@ -114,9 +113,71 @@ def test_event_index(client):
     assert len(response.json) == 4
 
 
+def test_event_index_stream(client):
+    token = get_token(client, "support")
+    auth_headers = {"Authorization": f"Bearer {token}"}
+    response = client.get("/events?stream=true", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.json == client.get("/events", headers=auth_headers).json
+
+
+def test_event_index_window(client):
+    token = get_token(client, "support")
+    auth_headers = {"Authorization": f"Bearer {token}"}
+    response = client.get(
+        "/events?from=2024-10-01T00:00:00&to=2024-10-08T00:00:00", headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert [event["id"] for event in response.json] == [2, 3]
+    # events that already ended drop out
+    response = client.get("/events?from=2024-10-20T00:00:00", headers=auth_headers)
+    assert [event["id"] for event in response.json] == [3]
+    response = client.get("/events?to=2024-06-01T00:00:00", headers=auth_headers)
+    assert [event["id"] for event in response.json] == [1, 4]
+
+
+def test_event_index_window_invalid(client):
+    token = get_token(client, "support")
+    response = client.get(
+        "/events?from=next-week", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 400
+
+
+def test_event_index_is_flat_by_default(client):
+    token = get_token(client, "support")
+    response = client.get("/events", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    json_event = response.json[0]
+    assert json_event["client_id"] == 1
+    assert json_event["support_contact_id"] == 2
+    assert "client" not in json_event
+    assert "support_contact" not in json_event
+
+
+def test_event_index_with_sparse_fields(client):
+    token = get_token(client, "support")
+    response = client.get(
+        "/events?fields=id,title,client.fullname,support_contact.fullname",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 200
+    assert response.json[0] == {
+        "id": 1,
+        "title": "Multi-tiered actuating database",
+        "client": {"fullname": "Gilburt Scarf"},
+        "support_contact": {"fullname": "Gare Wealthall"},
+    }
+    assert response.json[3]["support_contact"] is None
+
+
 def test_event_show(client):
     token = get_token(client, "support")
-    response = client.get("/events/1", headers={"Authorization": f"Bearer {token}"})
+    response = client.get(
+        "/events/1?expand=client,sales_contact,support_contact",
+        headers={"Authorization": f"Bearer {token}"},
+    )
     assert response.status_code == 200
     json_event = response.json
     assert json_event["title"] == "Multi-tiered actuating database"
@@ -149,7 +210,7 @@ def test_event_create(client):
         "attendees": 42,
     }
     response = client.post(
-        "/events",
+        "/events?expand=client,sales_contact",
         headers={"authorization": f"bearer {token}"},
         data=json.dumps(new_event),
         content_type="application/json",
@@ -220,7 +281,7 @@ def test_add_support_from_admin(client):
     token = get_token(client, "admin")
     update_event = {"support_contact_id": 2}
     response = client.put(
-        "/events/4/add-support",
+        "/events/4/add-support?expand=support_contact",
         headers={"Authorization": f"Bearer {token}"},
         data=json.dumps(update_event),
         content_type="application/json",
@@ -237,6 +298,46 @@ def test_add_support_from_admin(client):
     }
 
 
+def test_add_support_with_overlapping_event(client):
+    token = get_token(client, "admin")
+    # event 3 overlaps event 2, which Gare Wealthall already supports
+    response = client.put(
+        "/events/3/add-support",
+        headers={"Authorization": f"Bearer {token}"},
+        data=json.dumps({"support_contact_id": 2}),
+        content_type="application/json",
+    )
+    assert response.status_code == 409
+    assert response.json["conflicts"] == [2]
+    assert db.session.get(Event, 3).support_contact_id == 5
+
+
+def test_event_available_supports(client):
+    token = get_token(client, "admin")
+    auth_headers = {"Authorization": f"Bearer {token}"}
+    response = client.get("/events/3/available-supports", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json == [
+        {
+            "id": 5,
+            "fullname": "Codie Arnoud",
+            "email": "carnoud2@spiegel.de",
+            "load": 0,
+        }
+    ]
+    # both are free on event 4, each with one event still running at its start
+    response = client.get("/events/4/available-supports", headers=auth_headers)
+    assert [(user["id"], user["load"]) for user in response.json] == [(2, 1), (5, 1)]
+
+
+def test_event_available_supports_unauthorized(client):
+    token = get_token(client, "support")
+    response = client.get(
+        "/events/3/available-supports", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 403
+
+
 def test_add_support_from_support(client):
     token = get_token(client, "support")
     update_event = {"support_contact_id": 2}
@@ -256,7 +357,7 @@ def test_update_from_support(client):
     token = get_token(client, "support")
     update_event = {"notes": "Test update"}
     response = client.put(
-        "/events/1",
+        "/events/1?expand=support_contact",
         headers={"Authorization": f"Bearer {token}"},
         data=json.dumps(update_event),
         content_type="application/json",
@@ -274,6 +375,37 @@ def test_update_from_support(client):
     }
 
 
+def test_update_dates_from_support(client):
+    token = get_token(client, "support")
+    response = client.put(
+        "/events/1",
+        headers={"Authorization": f"Bearer {token}"},
+        data=json.dumps(
+            {"event_start": "2025-01-01 09:00:00", "event_end": "2025-01-01 18:00:00"}
+        ),
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+    assert response.json["event_start"] == "2025-01-01 09:00:00"
+    assert response.json["event_end"] == "2025-01-01 18:00:00"
+
+
+def test_update_dates_with_overlapping_event(client):
+    token = get_token(client, "support")
+    # event 2 is also supported by Gare Wealthall
+    response = client.put(
+        "/events/1",
+        headers={"Authorization": f"Bearer {token}"},
+        data=json.dumps(
+            {"event_start": "2024-10-01 00:00:00", "event_end": "2024-10-02 00:00:00"}
+        ),
+        content_type="application/json",
+    )
+    assert response.status_code == 409
+    assert response.json["conflicts"] == [2]
+    assert db.session.get(Event, 1).event_start == datetime(2024, 5, 11)
+
+
 def test_update_from_support_unauthorized(client):
     token = get_token(client, "support")
     update_event = {"support_contact_id": 2}
@@ -304,3 +436,106 @@ def test_destroy_event_unauthorized(client):
     assert response.status_code == 403
     events = db.session.scalars(sa.select(Event)).all()
     assert len(events) == 4
+
+
+def add_events(start, count):
+    for i in range(start, start + count):
+        user = User(
+            fullname=f"Sales {i}",
+            email=f"sales{i}@test.com",
+            phone="0123456789",
+            role=Role.SALES,
+        )
+        support = User(
+            fullname=f"Support {i}",
+            email=f"support{i}@test.com",
+            phone="0123456789",
+            role=Role.SUPPORT,
+        )
+        client = Client(
+            fullname=f"Client {i}",
+            email=f"client{i}@test.com",
+            phone="0123456789",
+            company="Test inc",
+            sales_contact=user,
+        )
+        contract = Contract(
+            client=client,
+            sales_contact=user,
+            total_amount=1000.0,
+            status=ContractStatus.SIGNED,
+        )
+        db.session.add(
+            Event(
+                title=f"Event {i}",
+                contract=contract,
+                client=client,
+                sales_contact=user,
+                support_contact=support,
+                event_start=datetime(2024, 5, 11),
+                event_end=datetime(2024, 5, 12),
+                location="test",
+                attendees=42,
+            )
+        )
+    db.session.commit()
+
+
+def count_queries(client, url, token):
+    statements = []
+    # authenticate first so the token is served from the token cache
+    client.get("/tokens", headers={"Authorization": f"Bearer {token}"})
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    db.session.expunge_all()
+    sa.event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = client.get(url, headers={"Authorization": f"Bearer {token}"})
+    finally:
+        sa.event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+    assert response.status_code == 200
+    return len(statements), response.json
+
+
+def test_event_index_query_count_is_flat(client):
+    token = get_token(client, "support")
+    url = (
+        "/events?expand=contract.client.sales_contact,contract.sales_contact,"
+        "client.sales_contact,sales_contact,support_contact"
+    )
+    add_events(0, 5)
+    few_queries, events = count_queries(client, url, token)
+    assert len(events) == 9
+    add_events(5, 20)
+    many_queries, events = count_queries(client, url, token)
+    assert len(events) == 29
+    assert many_queries == few_queries
+
+
+# bulk create [auth, sales] => same rules as create
+def test_event_bulk_create(client):
+    token = get_token(client, "sales")
+    row = {
+        "title": "bulk title",
+        "contract_id": 1,
+        "event_start": "2024-05-11 00:00:00",
+        "event_end": "2024-05-12 00:00:00",
+        "location": "test",
+        "attendees": "42",
+    }
+    rows = [row, dict(row, contract_id=2), dict(row, contract_id=3)]
+    response = client.post(
+        "/events/bulk",
+        headers={"Authorization": f"Bearer {token}"},
+        data=json.dumps(rows),
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+    assert response.json["created"] == 1
+    assert [error["row"] for error in response.json["errors"]] == [1, 2]
+    events = db.session.scalars(sa.select(Event)).all()
+    assert len(events) == 5
+    assert events[-1].client_id == 1
+    assert events[-1].attendees == 42
@@ -0,0 +1,183 @@
+import base64
+import pytest
+from datetime import datetime
+
+from config import TestConfig
+from app import create_app, db
+from app.models import User, Client, Event, Contract
+from mock import (
+    users as mock_users,
+    clients as mock_clients,
+    contracts as mock_contracts,
+    events as mock_events,
+)
+
+
+@pytest.fixture()
+def app():
+    app = create_app(config_class=TestConfig)
+    with app.app_context():
+        db.create_all()
+        for user in mock_users:
+            db.session.add(
+                User(
+                    fullname=user[0],
+                    email=user[1],
+                    phone=user[2],
+                    role=user[3],
+                    password=user[4],
+                )
+            )
+            db.session.commit()
+        for client in mock_clients:
+            db.session.add(
+                Client(
+                    fullname=client[0],
+                    email=client[1],
+                    phone=client[2],
+                    company=client[3],
+                    sales_contact_id=client[4],
+                )
+            )
+            db.session.commit()
+        for contract in mock_contracts:
+            db.session.add(
+                Contract(
+                    client_id=contract[0],
+                    sales_contact_id=contract[1],
+                    total_amount=contract[2],
+                    remaining_amount=contract[3],
+                    status=contract[4],
+                )
+            )
+            db.session.commit()
+        date_format = "%Y-%m-%d %H:%M:%S"
+        for event in mock_events:
+            db.session.add(
+                Event(
+                    title=event[0],
+                    contract_id=event[1],
+                    client_id=event[2],
+                    sales_contact_id=event[3],
+                    support_contact_id=event[4],
+                    event_start=datetime.strptime(event[5], date_format),
+                    event_end=datetime.strptime(event[6], date_format),
+                    location=event[7],
+                    attendees=event[8],
+                    notes=event[9],
+                )
+            )
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    client = app.test_client()
+    yield client
+
+
+def get_token(client, role):
+    username = None
+    password = "test"
+    if role == "admin":
+        username = "qsanterh@plala.or.jp"
+    if role == "sales":
+        username = "estaterfield0@nsw.gov.au"
+    if role == "support":
+        username = "gwealthall1@indiegogo.com"
+    if username is not None:
+        response = client.post(
+            "/tokens",
+            headers={
+                "Authorization": "Basic "
+                + base64.b64encode(bytes(username + ":" + password, "ascii")).decode(
+                    "ascii"
+                )
+            },
+        )
+        return response.json["token"]
+
+
+# Lookup views
+
+
+# index [auth, entity list]
+def test_lookup_users(client):
+    token = get_token(client, "admin")
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.get("/lookup/users?prefix=ga", headers=headers)
+    assert response.status_code == 200
+    assert response.json == [{"id": 2, "label": "Gare Wealthall (support)"}]
+    response = client.get("/lookup/users?dept=support", headers=headers)
+    assert [user["id"] for user in response.json] == [5, 2]
+
+
+def test_lookup_users_unauthorized(client):
+    token = get_token(client, "support")
+    response = client.get(
+        "/lookup/users?prefix=ga", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 403
+
+
+def test_lookup_clients(client):
+    token = get_token(client, "sales")
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.get("/lookup/clients?prefix=TA", headers=headers)
+    assert response.json == [{"id": 3, "label": "Tamra Aiskrigg (Feest-Pollich)"}]
+    response = client.get("/lookup/clients?limit=2", headers=headers)
+    assert [row["label"] for row in response.json] == [
+        "Gilburt Scarf (Schulist-Hayes)",
+        "Lane Elener (Heller-Becker)",
+    ]
+
+
+def test_lookup_clients_accented(client):
+    db.session.add(
+        Client(
+            fullname="Élodie Ébert",
+            email="eebert@test.com",
+            phone="0102030405",
+            company="Étoile",
+            sales_contact_id=1,
+        )
+    )
+    db.session.commit()
+    token = get_token(client, "sales")
+    headers = {"Authorization": f"Bearer {token}"}
+    for prefix in ["Élo", "ÉLO"]:
+        response = client.get(f"/lookup/clients?prefix={prefix}", headers=headers)
+        assert response.json == [{"id": 6, "label": "Élodie Ébert (Étoile)"}]
+    # SQLite only folds the case of ASCII letters
+    assert client.get("/lookup/clients?prefix=élo", headers=headers).json == []
+
+
+def test_lookup_contracts(client):
+    token = get_token(client, "sales")
+    response = client.get(
+        "/lookup/contracts?prefix=gil&status=signed",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.json == [
+        {"id": 1, "label": "Gilburt Scarf (signed, remaining 1486.28)"}
+    ]
+
+
+def test_lookup_events(client):
+    token = get_token(client, "support")
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.get("/lookup/events?prefix=multi", headers=headers)
+    assert [event["id"] for event in response.json] == [1, 4]
+    assert response.json[0]["label"] == "Multi-tiered actuating database (2024-05-11)"
+    response = client.get("/lookup/events?prefix=multi&support=none", headers=headers)
+    assert [event["id"] for event in response.json] == [4]
+
+
+def test_lookup_unknown_entity(client):
+    token = get_token(client, "admin")
+    response = client.get(
+        "/lookup/tokens?prefix=a", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 404
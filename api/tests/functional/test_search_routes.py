@@ -0,0 +1,283 @@
+import base64
+import pytest
+import sqlalchemy as sa
+from datetime import datetime
+
+from config import TestConfig
+from app import create_app, db
+from app.models import User, Client, Event, Contract
+from mock import (
+    users as mock_users,
+    clients as mock_clients,
+    contracts as mock_contracts,
+    events as mock_events,
+)
+
+
+@pytest.fixture()
+def app():
+    app = create_app(config_class=TestConfig)
+    with app.app_context():
+        db.create_all()
+        for user in mock_users:
+            db.session.add(
+                User(
+                    fullname=user[0],
+                    email=user[1],
+                    phone=user[2],
+                    role=user[3],
+                    password=user[4],
+                )
+            )
+            db.session.commit()
+        for client in mock_clients:
+            db.session.add(
+                Client(
+                    fullname=client[0],
+                    email=client[1],
+                    phone=client[2],
+                    company=client[3],
+                    sales_contact_id=client[4],
+                )
+            )
+            db.session.commit()
+        for contract in mock_contracts:
+            db.session.add(
+                Contract(
+                    client_id=contract[0],
+                    sales_contact_id=contract[1],
+                    total_amount=contract[2],
+                    remaining_amount=contract[3],
+                    status=contract[4],
+                )
+            )
+            db.session.commit()
+        date_format = "%Y-%m-%d %H:%M:%S"
+        for event in mock_events:
+            db.session.add(
+                Event(
+                    title=event[0],
+                    contract_id=event[1],
+                    client_id=event[2],
+                    sales_contact_id=event[3],
+                    support_contact_id=event[4],
+                    event_start=datetime.strptime(event[5], date_format),
+                    event_end=datetime.strptime(event[6], date_format),
+                    location=event[7],
+                    attendees=event[8],
+                    notes=event[9],
+                )
+            )
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    client = app.test_client()
+    yield client
+
+
+def get_token(client, role):
+    username = None
+    password = "test"
+    if role == "admin":
+        username = "qsanterh@plala.or.jp"
+    if role == "sales":
+        username = "estaterfield0@nsw.gov.au"
+    if role == "support":
+        username = "gwealthall1@indiegogo.com"
+    if username is not None:
+        response = client.post(
+            "/tokens",
+            headers={
+                "Authorization": "Basic "
+                + base64.b64encode(bytes(username + ":" + password, "ascii")).decode(
+                    "ascii"
+                )
+            },
+        )
+        return response.json["token"]
+
+
+# Search views
+
+
+# search [auth]
+def test_search_clients(client):
+    token = get_token(client, "support")
+    response = client.get(
+        "/search?q=tuttocitta", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200
+    assert [row["id"] for row in response.json["clients"]] == [1, 2]
+    assert response.json["events"] == []
+
+
+def test_search_is_ranked(client):
+    token = get_token(client, "support")
+    db.session.add(
+        Client(
+            fullname="Jo Bell",
+            email="jbell@test.com",
+            phone="0102030405",
+            company="Rohlf Catering",
+            sales_contact_id=1,
+        )
+    )
+    db.session.commit()
+    response = client.get(
+        "/search?q=rohl", headers={"Authorization": f"Bearer {token}"}
+    )
+    # a name match ranks above a company match
+    assert [row["fullname"] for row in response.json["clients"]] == [
+        "Mano Rohlf",
+        "Jo Bell",
+    ]
+    scores = [row["score"] for row in response.json["clients"]]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_search_events(client):
+    token = get_token(client, "support")
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.get("/search?q=kiru", headers=headers)
+    assert [row["id"] for row in response.json["events"]] == [2]
+    # notes are searched too, every word must match
+    response = client.get("/search?q=vestibulum+rutrum", headers=headers)
+    assert [row["id"] for row in response.json["events"]] == [1, 4]
+
+
+def test_search_follows_updates(client):
+    token = get_token(client, "support")
+    headers = {"Authorization": f"Bearer {token}"}
+    event = db.session.get(Event, 2)
+    event.location = "Tromso"
+    db.session.commit()
+    assert client.get("/search?q=kiruna", headers=headers).json["events"] == []
+    response = client.get("/search?q=tromso", headers=headers)
+    assert [row["id"] for row in response.json["events"]] == [2]
+    db.session.delete(event)
+    db.session.commit()
+    assert client.get("/search?q=tromso", headers=headers).json["events"] == []
+
+
+def test_search_bulk_imports(client):
+    token = get_token(client, "sales")
+    headers = {"Authorization": f"Bearer {token}"}
+    rows = [
+        {
+            "fullname": "Ada Quill",
+            "email": "aquill@test.com",
+            "phone": "0102030405",
+            "company": "Quill Events",
+        }
+    ]
+    response = client.post("/clients/bulk", headers=headers, json=rows)
+    assert response.json["created"] == 1
+    response = client.get("/search?q=quill", headers=headers)
+    assert [row["fullname"] for row in response.json["clients"]] == ["Ada Quill"]
+
+
+def test_search_bulk_imports_without_returning(client, monkeypatch):
+    # MySQL has no RETURNING
+    monkeypatch.setattr(db.engine.dialect, "insert_returning", False)
+    monkeypatch.setattr(db.engine.dialect, "insert_executemany_returning", False)
+    test_search_bulk_imports(client)
+
+
+def test_search_follows_sql_writes(client):
+    # seeds like db.txt write the tables without the ORM
+    token = get_token(client, "sales")
+    headers = {"Authorization": f"Bearer {token}"}
+    db.session.execute(
+        sa.text(
+            "INSERT INTO client (fullname, email, phone, company, sales_contact_id, "
+            "created_at, updated_at) VALUES ('Ada Quill', 'aquill@test.com', "
+            "'0102030405', 'Quill Events', 1, '2025-01-01', '2025-01-01')"
+        )
+    )
+    db.session.commit()
+    response = client.get("/search?q=quill", headers=headers)
+    assert [row["fullname"] for row in response.json["clients"]] == ["Ada Quill"]
+    db.session.execute(
+        sa.text("UPDATE client SET company = 'Nib Events' WHERE fullname = 'Ada Quill'")
+    )
+    db.session.commit()
+    response = client.get("/search?q=nib", headers=headers)
+    assert [row["company"] for row in response.json["clients"]] == ["Nib Events"]
+    db.session.execute(sa.text("DELETE FROM client WHERE fullname = 'Ada Quill'"))
+    db.session.commit()
+    assert client.get("/search?q=nib", headers=headers).json["clients"] == []
+
+
+def test_search_with_sparse_fields(client):
+    token = get_token(client, "support")
+    response = client.get(
+        "/search?q=scarf&fields=id,fullname",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.json["clients"] == [
+        {
+            "id": 1,
+            "fullname": "Gilburt Scarf",
+            "score": response.json["clients"][0]["score"],
+        }
+    ]
+
+
+def count_queries(client, url, token):
+    statements = []
+    # authenticate first so the token is served from the token cache
+    client.get("/tokens", headers={"Authorization": f"Bearer {token}"})
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    db.session.expunge_all()
+    sa.event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = client.get(url, headers={"Authorization": f"Bearer {token}"})
+    finally:
+        sa.event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+    assert response.status_code == 200
+    return len(statements), response.json
+
+
+def test_search_query_count_is_flat(client):
+    token = get_token(client, "support")
+    url = "/search?q=multi&limit=50&expand=client,sales_contact,contract.client"
+    few_queries, results = count_queries(client, url, token)
+    assert len(results["events"]) == 2
+    for i in range(10):
+        contract = db.session.get(Contract, i % 5 + 1)
+        db.session.add(
+            Event(
+                title=f"Multi event {i}",
+                contract=contract,
+                client_id=contract.client_id,
+                sales_contact_id=contract.sales_contact_id,
+                event_start=datetime(2024, 5, 11),
+                event_end=datetime(2024, 5, 12),
+                location="test",
+                attendees=42,
+            )
+        )
+    db.session.commit()
+    many_queries, results = count_queries(client, url, token)
+    assert len(results["events"]) == 12
+    assert many_queries == few_queries
+
+
+def test_search_without_words(client):
+    token = get_token(client, "support")
+    response = client.get(
+        "/search?q=%22*", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 400
+
+
+def test_search_unauthenticated(client):
+    response = client.get("/search?q=scarf")
+    assert response.status_code == 401
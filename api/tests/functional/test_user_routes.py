@@ -1,6 +1,8 @@
 import base64
 import json
 import pytest
+import sqlalchemy as sa
+from datetime import datetime, timezone
 from werkzeug.security import check_password_hash
 from config import TestConfig
 from app import create_app, db
@@ -180,3 +182,50 @@ def test_authorize_destroy_user(client):
     assert response.get("message") == "User removed"
     response = client.get("/users", headers={"Authorization": f"Bearer {token}"})
     assert len(response.json) == 4
+
+
+def test_login_does_not_touch_updated_at(client):
+    since = datetime.now(timezone.utc)
+    token = get_token(client, "admin")
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.get(
+        "/users", query_string={"updated_since": since.isoformat()}, headers=headers
+    )
+    assert response.json == []
+    client.put(
+        "/users/2",
+        headers=headers,
+        data=json.dumps({"fullname": "Gare Updated"}),
+        content_type="application/json",
+    )
+    response = client.get(
+        "/users", query_string={"updated_since": since.isoformat()}, headers=headers
+    )
+    assert [user["id"] for user in response.json] == [2]
+
+
+def test_login_keeps_etags(client):
+    headers = {"Authorization": f"Bearer {get_token(client, 'admin')}"}
+    etag = client.get("/users", headers=headers).headers["ETag"]
+    get_token(client, "sales")
+    get_token(client, "support")
+    response = client.get("/users", headers=dict(headers, **{"If-None-Match": etag}))
+    assert response.status_code == 304
+
+
+def test_login_does_not_conflict_with_an_edit(client):
+    headers = {"Authorization": f"Bearer {get_token(client, 'admin')}"}
+    with sa.orm.Session(db.engine) as session:
+        # a login that read the user before the edit below
+        user = session.get(User, 2)
+        response = client.put(
+            "/users/2",
+            headers=headers,
+            data=json.dumps({"fullname": "Gare Updated"}),
+            content_type="application/json",
+        )
+        assert response.status_code == 200
+        user.token = "0" * 32
+        session.commit()
+    response = client.get("/users/2", headers=headers)
+    assert response.json["fullname"] == "Gare Updated"
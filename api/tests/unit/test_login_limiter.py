@@ -0,0 +1,37 @@
+from app.auth import ratelimit
+from app.auth.ratelimit import LoginLimiter
+
+
+def test_limited_after_max_attempts():
+    limiter = LoginLimiter(max_attempts=2, window=60)
+    limiter.fail("user")
+    assert limiter.retry_after("user") == 0
+    limiter.fail("user")
+    assert 0 < limiter.retry_after("user") <= 61
+    assert limiter.retry_after("other") == 0
+
+
+def test_failures_expire_after_window(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: now[0])
+    limiter = LoginLimiter(max_attempts=2, window=60)
+    limiter.fail("user")
+    limiter.fail("user")
+    assert limiter.retry_after("user") == 61
+    now[0] += 61
+    assert limiter.retry_after("user") == 0
+
+
+def test_reset_clears_failures():
+    limiter = LoginLimiter(max_attempts=1, window=60)
+    limiter.fail("user")
+    limiter.reset("user")
+    assert limiter.retry_after("user") == 0
+
+
+def test_accounts_are_bounded():
+    limiter = LoginLimiter(max_attempts=1, window=60, maxsize=2)
+    for key in ["a", "b", "c"]:
+        limiter.fail(key)
+    assert limiter.retry_after("a") == 0
+    assert limiter.retry_after("c") > 0
@@ -0,0 +1,97 @@
+from datetime import datetime
+
+import pytest
+import sqlalchemy as sa
+from config import TestConfig
+from app import create_app, db
+from app.core.assignments import overlapping
+from app.core.lookup import lookup_query
+from app.models import Client, Contract, ContractStatus, Event
+
+
+@pytest.fixture()
+def app():
+    app = create_app(config_class=TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def query_plan(query):
+    statement = query.compile(db.engine, compile_kwargs={"literal_binds": True})
+    plan = db.session.execute(sa.text(f"EXPLAIN QUERY PLAN {statement}")).all()
+    return " ".join(row[-1] for row in plan)
+
+
+def index_page(model, *conditions):
+    # same shape as the list routes: filters, keyset order and limit
+    return sa.select(model).where(*conditions).order_by(model.id).limit(101)
+
+
+def test_unpaid_signed_contracts_use_partial_index(app):
+    plan = query_plan(
+        index_page(
+            Contract,
+            Contract.status == ContractStatus.SIGNED,
+            Contract.remaining_amount > 0,
+        )
+    )
+    assert "USING INDEX ix_contract_unpaid" in plan
+
+
+def test_contracts_by_status_use_index(app):
+    plan = query_plan(index_page(Contract, Contract.status == ContractStatus.PENDING))
+    assert "USING INDEX ix_contract_status" in plan
+
+
+def test_events_without_support_use_index(app):
+    plan = query_plan(index_page(Event, Event.support_contact_id == None))
+    assert "ix_event_support_schedule" in plan
+
+
+@pytest.mark.parametrize(
+    "column, index",
+    [
+        (Event.sales_contact_id, "ix_event_sales_contact_id"),
+        (Event.contract_id, "ix_event_contract_id"),
+        (Contract.client_id, "ix_contract_client_id"),
+        (Client.sales_contact_id, "ix_client_sales_contact_id"),
+    ],
+)
+def test_foreign_key_lookups_use_index(app, column, index):
+    plan = query_plan(sa.select(column.class_).where(column == 1))
+    assert index in plan
+
+
+def test_event_window_uses_schedule_index(app):
+    window = sa.select(Event.id).where(
+        Event.event_end >= datetime(2024, 9, 16),
+        Event.event_start < datetime(2024, 9, 23),
+    )
+    plan = query_plan(index_page(Event, Event.id.in_(window)))
+    assert "USING COVERING INDEX ix_event_schedule" in plan
+    assert "SCAN event" not in plan
+
+
+def test_support_conflicts_use_support_schedule_index(app):
+    event = Event(
+        id=1, event_start=datetime(2024, 9, 16), event_end=datetime(2024, 9, 18)
+    )
+    plan = query_plan(overlapping(event, 2))
+    assert "USING COVERING INDEX ix_event_support_schedule" in plan
+
+
+@pytest.mark.parametrize(
+    "entity, index",
+    [
+        ("users", "ix_user_fullname_lower"),
+        ("clients", "ix_client_fullname_lower"),
+        ("contracts", "ix_client_fullname_lower"),
+        ("events", "ix_event_title_lower"),
+    ],
+)
+def test_prefix_lookups_use_lower_case_index(app, entity, index):
+    plan = query_plan(lookup_query(entity, "Ma", 10, []))
+    assert f"USING INDEX {index}" in plan
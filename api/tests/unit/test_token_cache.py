@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta, timezone
+from app.auth.cache import AuthUser, TokenCache
+from app.models import Role
+
+
+def auth_user(id, expires_in=3600):
+    return AuthUser(
+        id=id,
+        fullname=f"User {id}",
+        role=Role.SALES,
+        token_expiration=datetime.now(timezone.utc) + timedelta(seconds=expires_in),
+        issued_at=0.0,
+    )
+
+
+def test_cache_hit_and_miss():
+    cache = TokenCache()
+    assert cache.get("token") is None
+    cache.set("token", auth_user(1))
+    assert cache.get("token").id == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_cache_evicts_least_recently_used():
+    cache = TokenCache(maxsize=2)
+    cache.set("a", auth_user(1))
+    cache.set("b", auth_user(2))
+    cache.get("a")
+    cache.set("c", auth_user(3))
+    assert cache.get("b") is None
+    assert cache.get("a").id == 1
+    assert cache.get("c").id == 3
+
+
+def test_cache_drops_expired_tokens():
+    cache = TokenCache()
+    cache.set("token", auth_user(1, expires_in=-1))
+    assert cache.get("token") is None
+    cache = TokenCache(ttl=-1)
+    cache.set("token", auth_user(1))
+    assert cache.get("token") is None
+
+
+def test_cache_invalidate_user():
+    cache = TokenCache()
+    cache.set("a", auth_user(1))
+    cache.set("b", auth_user(2))
+    cache.invalidate_user(1)
+    assert cache.get("a") is None
+    assert cache.get("b").id == 2
@@ -0,0 +1,102 @@
+import json
+import time
+from datetime import timedelta
+from email.utils import parsedate_to_datetime
+
+import requests
+
+from cli.helpers import ids_path, session, token_path
+
+# Shell completion for entity ids, answered from a small index per entity
+# kept in the app dir ({"since", "checked_at", "ids": {id: label}}).
+# The index is refreshed at most every REFRESH_INTERVAL seconds with the rows
+# updated since the last refresh, completions never wait on the API otherwise.
+# Deleted entities stay listed until a delete through the CLI drops them.
+
+REFRESH_INTERVAL = 300
+REFRESH_TIMEOUT = 2
+
+# entity -> (fields, label)
+ID_INDEXES = {
+    "users": ("id,fullname", lambda row: row["fullname"]),
+    "clients": ("id,fullname", lambda row: row["fullname"]),
+    "contracts": ("id,client.fullname", lambda row: row["client"]["fullname"]),
+    "events": ("id,title", lambda row: row["title"]),
+}
+
+
+def index_path(entity):
+    return ids_path / f"{entity}.json"
+
+
+def load_index(entity):
+    try:
+        with open(index_path(entity), "r") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {"since": None, "checked_at": 0, "ids": {}}
+
+
+def save_index(entity, index):
+    ids_path.mkdir(parents=True, exist_ok=True)
+    path = index_path(entity)
+    temp_path = path.with_suffix(".tmp")
+    with open(temp_path, "w") as file:
+        json.dump(index, file)
+    temp_path.replace(path)
+
+
+def refresh_index(entity, index):
+    # completions run outside of any command, the token is read here and
+    # nothing is prompted or printed
+    with open(token_path, "r") as file:
+        headers = {"Authorization": f"Bearer {file.read()}"}
+    fields, label = ID_INDEXES[entity]
+    params = {"fields": fields, "limit": 1000}
+    if index["since"]:
+        params["updated_since"] = index["since"]
+    url = f"/{entity}"
+    since = None
+    while url:
+        response = session.get(
+            url, params=params, headers=headers, timeout=REFRESH_TIMEOUT
+        )
+        if response.status_code != 200:
+            return
+        if since is None:
+            # server clock, a second earlier for the rows updated meanwhile
+            since = parsedate_to_datetime(response.headers["Date"])
+            since -= timedelta(seconds=1)
+        for row in response.json():
+            index["ids"][str(row["id"])] = label(row)
+        url = response.links.get("next", {}).get("url")
+        params = None
+    index["since"] = since.isoformat()
+
+
+def complete_ids(entity):
+    def complete(incomplete: str):
+        index = load_index(entity)
+        if (
+            time.time() - index["checked_at"] > REFRESH_INTERVAL
+            and token_path.is_file()
+        ):
+            index["checked_at"] = time.time()
+            try:
+                refresh_index(entity, index)
+            except (requests.RequestException, KeyError, TypeError, ValueError):
+                pass
+            save_index(entity, index)
+        return [
+            (id, label)
+            for id, label in sorted(index["ids"].items(), key=lambda item: int(item[0]))
+            if id.startswith(incomplete)
+        ]
+
+    return complete
+
+
+def forget_id(entity, id):
+    index = load_index(entity)
+    if index["ids"].pop(str(id), None) is not None:
+        save_index(entity, index)
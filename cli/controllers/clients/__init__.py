@@ -1,18 +1,29 @@
-import json
 from typing import Optional
 from email_validator.exceptions_types import EmailNotValidError
 from email_validator.validate_email import validate_email
 from typing_extensions import Annotated
 import typer
-import requests
 import typer
-from cli.helpers import authenticate, handle_response, sanitize_fullname
-from cli.views.clients import clients_list_view, client_show_view
-from cli.views.shared import message_show_view
+from cli.helpers import (
+    authenticate,
+    get_pages,
+    handle_response,
+    import_rows,
+    prompt_id,
+    sanitize_fullname,
+    session,
+)
+from cli.views.clients import CLIENT_FIELDS, clients_list_view, client_show_view
+from cli.views.shared import import_report_view, message_show_view
+from cli.completion import complete_ids, forget_id
 from cli.rbac import authorize
 
 app = typer.Typer()
 
+IdArgument = Annotated[
+    int, typer.Argument(help="The client id", autocompletion=complete_ids("clients"))
+]
+
 
 @app.callback()
 def authorize_commands(ctx: typer.Context):
@@ -49,36 +60,41 @@ def create(
         "phone": phone,
         "company": company,
     }
-    token = authenticate()
-    response = requests.post(
-        "http://localhost:5000/clients",
-        headers={
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json",
-        },
-        data=json.dumps(new_client),
+    authenticate()
+    response = session.post(
+        "/clients",
+        params={"fields": CLIENT_FIELDS},
+        json=new_client,
     )
     data = handle_response(response)
     message_show_view({"Success": "Client Created"})
     client_show_view(data)
 
 
+@app.command("import")
+def import_(
+    file: Annotated[
+        typer.FileText,
+        typer.Argument(help="CSV file with the columns: fullname,email,phone,company"),
+    ],
+):
+    authenticate()
+    report = import_rows("/clients/bulk", file)
+    import_report_view(report)
+
+
 @app.command()
 def list():
-    token = authenticate()
-    response = requests.get(
-        "http://localhost:5000/clients", headers={"Authorization": f"Bearer {token}"}
-    )
-    data = handle_response(response)
+    authenticate()
+    data = get_pages("/clients", params={"fields": CLIENT_FIELDS}, cache=True)
     clients_list_view(data)
 
 
 @app.command()
-def show(id: int):
-    token = authenticate()
-    response = requests.get(
-        f"http://localhost:5000/clients/{id}",
-        headers={"Authorization": f"Bearer {token}"},
+def show(id: IdArgument):
+    authenticate()
+    response = session.get(
+        f"/clients/{id}", params={"fields": CLIENT_FIELDS}, cache=True
     )
     data = handle_response(response)
     client_show_view(data)
@@ -86,9 +102,11 @@ def show(id: int):
 
 @app.command()
 def update(
-    ctx: typer.Context,
     id: Annotated[
-        Optional[int], typer.Option("--id", "-i", help="The client id")
+        Optional[int],
+        typer.Option(
+            "--id", "-i", help="The client id", autocompletion=complete_ids("clients")
+        ),
     ] = None,
     fullname: Annotated[
         Optional[str],
@@ -108,8 +126,7 @@ def update(
     ] = None,
 ):
     if not id:
-        ctx.invoke(list)
-        id = typer.prompt("Please choose client to update")
+        id = prompt_id("clients", "Please choose client to update")
     payload = {}
     payload["fullname"] = sanitize_fullname(fullname) if fullname else None
     if email:
@@ -130,14 +147,11 @@ def update(
         if payload[key] is not None:
             update_client[key] = payload[key]
     if update_client.keys():
-        token = authenticate()
-        response = requests.put(
-            f"http://localhost:5000/clients/{id}",
-            headers={
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/json",
-            },
-            data=json.dumps(update_client),
+        authenticate()
+        response = session.put(
+            f"/clients/{id}",
+            params={"fields": CLIENT_FIELDS},
+            json=update_client,
         )
         data = handle_response(response)
         message_show_view({"Success": "Client Updated"})
@@ -147,20 +161,20 @@ def update(
 
 
 @app.command()
-def delete(id: int):
-    token = authenticate()
-    client = requests.get(
-        f"http://localhost:5000/clients/{id}",
-        headers={"Authorization": f"Bearer {token}"},
+def delete(id: IdArgument):
+    authenticate()
+    client = session.get(
+        f"/clients/{id}",
+        params={"fields": CLIENT_FIELDS},
     )
     data = handle_response(client)
     client_show_view(data)
     typer.confirm(
         "Do you really want to delete this client? There is no going back.", abort=True
     )
-    response = requests.delete(
-        f"http://localhost:5000/clients/{id}",
-        headers={"Authorization": f"Bearer {token}"},
+    response = session.delete(
+        f"/clients/{id}",
     )
     data = handle_response(response)
+    forget_id("clients", id)
     message_show_view(data)
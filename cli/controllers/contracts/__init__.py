@@ -1,17 +1,33 @@
-import json
 from typing import Optional
 from typing_extensions import Annotated
 import typer
-import requests
 import typer
-from cli.helpers import authenticate, handle_response, validate_contract_status
-from cli.views.contracts import contracts_list_view, contract_show_view
-from cli.controllers.clients import list as clients_list
-from cli.views.shared import message_show_view
+from cli.helpers import (
+    authenticate,
+    get_pages,
+    handle_response,
+    import_rows,
+    prompt_id,
+    session,
+    validate_contract_status,
+)
+from cli.views.contracts import (
+    CONTRACT_FIELDS,
+    contracts_list_view,
+    contract_show_view,
+    contract_stats_view,
+)
+from cli.views.shared import import_report_view, message_show_view
+from cli.completion import complete_ids, forget_id
 from cli.rbac import authorize
 
 app = typer.Typer()
 
+IdArgument = Annotated[
+    int,
+    typer.Argument(help="The contract id", autocompletion=complete_ids("contracts")),
+]
+
 
 @app.callback()
 def authorize_commands(ctx: typer.Context):
@@ -20,7 +36,6 @@ def authorize_commands(ctx: typer.Context):
 
 @app.command()
 def create(
-    ctx: typer.Context,
     total_amount: Annotated[
         float,
         typer.Option("--amount", help="The contract amount", prompt=True),
@@ -30,24 +45,32 @@ def create(
     ] = None,
 ):
     if not client:
-        ctx.invoke(clients_list)
-        client = typer.prompt("Please choose a client to create the contract")
+        client = prompt_id("clients", "Please choose a client to create the contract")
     if client is int and total_amount is float or int:
         new_contract = {"client_id": client, "total_amount": total_amount}
-        token = authenticate()
-        response = requests.post(
-            "http://localhost:5000/contracts",
-            headers={
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/json",
-            },
-            data=json.dumps(new_contract),
+        authenticate()
+        response = session.post(
+            "/contracts",
+            params={"fields": CONTRACT_FIELDS},
+            json=new_contract,
         )
         data = handle_response(response)
         message_show_view({"Success": "Contract Created"})
         contract_show_view(data)
 
 
+@app.command("import")
+def import_(
+    file: Annotated[
+        typer.FileText,
+        typer.Argument(help="CSV file with the columns: client_id,total_amount"),
+    ],
+):
+    authenticate()
+    report = import_rows("/contracts/bulk", file)
+    import_report_view(report)
+
+
 @app.command()
 def list(
     status: Annotated[
@@ -71,31 +94,43 @@ def list(
         active_filters += (
             "&remaining-amount=true" if status else "?remaining-amount=true"
         )
-    token = authenticate()
-    response = requests.get(
-        f"http://localhost:5000/contracts{active_filters}",
-        headers={"Authorization": f"Bearer {token}"},
+    authenticate()
+    data = get_pages(
+        f"/contracts{active_filters}",
+        params={"fields": CONTRACT_FIELDS},
+        cache=True,
     )
-    data = handle_response(response)
     contracts_list_view(data)
 
 
 @app.command()
-def show(id: int):
-    token = authenticate()
-    response = requests.get(
-        f"http://localhost:5000/contracts/{id}",
-        headers={"Authorization": f"Bearer {token}"},
+def show(id: IdArgument):
+    authenticate()
+    response = session.get(
+        f"/contracts/{id}", params={"fields": CONTRACT_FIELDS}, cache=True
     )
     data = handle_response(response)
     contract_show_view(data)
 
 
+@app.command()
+def stats():
+    authenticate()
+    response = session.get("/contracts/stats")
+    data = handle_response(response)
+    contract_stats_view(data)
+
+
 @app.command()
 def update(
-    ctx: typer.Context,
     id: Annotated[
-        Optional[int], typer.Option("--id", "-i", help="The contract id")
+        Optional[int],
+        typer.Option(
+            "--id",
+            "-i",
+            help="The contract id",
+            autocompletion=complete_ids("contracts"),
+        ),
     ] = None,
     total_amount: Annotated[
         Optional[float],
@@ -110,8 +145,7 @@ def update(
     ] = None,
 ):
     if not id:
-        ctx.invoke(list)
-        id = typer.prompt("Please choose a contract to update")
+        id = prompt_id("contracts", "Please choose a contract to update")
     payload = {}
     payload["total_amount"] = float(total_amount) if total_amount else None
     payload["remaining_amount"] = float(remaining_amount) if remaining_amount else None
@@ -121,14 +155,11 @@ def update(
         if payload[key] is not None:
             update_contract[key] = payload[key]
     if update_contract.keys():
-        token = authenticate()
-        response = requests.put(
-            f"http://localhost:5000/contracts/{id}",
-            headers={
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/json",
-            },
-            data=json.dumps(update_contract),
+        authenticate()
+        response = session.put(
+            f"/contracts/{id}",
+            params={"fields": CONTRACT_FIELDS},
+            json=update_contract,
         )
         data = handle_response(response)
         message_show_view({"Success": "Contract Updated"})
@@ -136,11 +167,11 @@ def update(
 
 
 @app.command()
-def delete(id: int):
-    token = authenticate()
-    contract = requests.get(
-        f"http://localhost:5000/contracts/{id}",
-        headers={"Authorization": f"Bearer {token}"},
+def delete(id: IdArgument):
+    authenticate()
+    contract = session.get(
+        f"/contracts/{id}",
+        params={"fields": CONTRACT_FIELDS},
     )
     data = handle_response(contract)
     contract_show_view(data)
@@ -148,9 +179,9 @@ def delete(id: int):
         "Do you really want to delete this contract? There is no going back.",
         abort=True,
     )
-    response = requests.delete(
-        f"http://localhost:5000/contracts/{id}",
-        headers={"Authorization": f"Bearer {token}"},
+    response = session.delete(
+        f"/contracts/{id}",
     )
     data = handle_response(response)
+    forget_id("contracts", id)
     message_show_view(data)
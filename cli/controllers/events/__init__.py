@@ -1,18 +1,34 @@
-import json
+from datetime import date, datetime, time, timedelta
 from typing import Optional
 from typing_extensions import Annotated
 import typer
-import requests
 import typer
-from cli.helpers import authenticate, handle_response
-from cli.views.events import events_list_view, event_show_view
-from cli.controllers.contracts import list as contracts_list
-from cli.controllers.users import list as users_list
-from cli.views.shared import message_show_view
+from cli.helpers import (
+    authenticate,
+    get_pages,
+    handle_response,
+    import_rows,
+    prompt_id,
+    session,
+)
+from cli.views.events import (
+    EVENT_FIELDS,
+    EVENTS_FIELDS,
+    available_supports_view,
+    events_calendar_view,
+    events_list_view,
+    event_show_view,
+)
+from cli.views.shared import import_report_view, message_show_view
+from cli.completion import complete_ids, forget_id
 from cli.rbac import authorize
 
 app = typer.Typer()
 
+IdArgument = Annotated[
+    int, typer.Argument(help="The event id", autocompletion=complete_ids("events"))
+]
+
 
 @app.callback()
 def authorize_commands(ctx: typer.Context):
@@ -21,7 +37,6 @@ def authorize_commands(ctx: typer.Context):
 
 @app.command()
 def create(
-    ctx: typer.Context,
     title: Annotated[
         str, typer.Option("--title", "-t", help="The event title", prompt=True)
     ],
@@ -52,10 +67,11 @@ def create(
         Optional[int], typer.Option("--contract", "-c", help="The contract id")
     ] = None,
 ):
-    token = authenticate()
+    authenticate()
     if not contract:
-        ctx.invoke(contracts_list, "signed")
-        contract = int(typer.prompt("Please choose a contract for this event"))
+        contract = prompt_id(
+            "contracts", "Please choose a contract for this event", {"status": "signed"}
+        )
     new_event = {
         "title": title,
         "contract_id": contract,
@@ -65,19 +81,30 @@ def create(
         "attendees": attendees,
         "notes": notes if notes else None,
     }
-    response = requests.post(
-        "http://localhost:5000/events",
-        headers={
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json",
-        },
-        data=json.dumps(new_event),
+    response = session.post(
+        "/events",
+        params={"fields": EVENT_FIELDS},
+        json=new_event,
     )
     data = handle_response(response)
     message_show_view({"Success": "Event Created"})
     event_show_view(data)
 
 
+@app.command("import")
+def import_(
+    file: Annotated[
+        typer.FileText,
+        typer.Argument(
+            help="CSV file with the columns: title,contract_id,event_start,event_end,location,attendees,notes"
+        ),
+    ],
+):
+    authenticate()
+    report = import_rows("/events/bulk", file)
+    import_report_view(report)
+
+
 @app.command()
 def list(
     filter: Annotated[
@@ -93,53 +120,88 @@ def list(
     active_filter = ""
     if filter and filter in filters.keys():
         active_filter = f"?support={filters[filter]}"
-    token = authenticate()
-    response = requests.get(
-        f"http://localhost:5000/events{active_filter}",
-        headers={"Authorization": f"Bearer {token}"},
+    authenticate()
+    data = get_pages(
+        f"/events{active_filter}",
+        params={"fields": EVENTS_FIELDS},
+        cache=True,
     )
-    data = handle_response(response)
     events_list_view(data)
 
 
 @app.command()
-def show(id: int):
-    token = authenticate()
-    response = requests.get(
-        f"http://localhost:5000/events/{id}",
-        headers={"Authorization": f"Bearer {token}"},
-    )
+def calendar(
+    week: Annotated[
+        bool, typer.Option("--week", "-w", help="Show the whole week of the day")
+    ] = False,
+    day: Annotated[
+        Optional[datetime],
+        typer.Option("--day", "-d", formats=["%Y-%m-%d"], help="Defaults to today"),
+    ] = None,
+    filter: Annotated[
+        Optional[str],
+        typer.Option(
+            "--filter",
+            "-f",
+            help="Filter the results: Options are 'assigned' or 'no-support'",
+        ),
+    ] = None,
+):
+    # only the events overlapping the period are fetched, past ones stay on the server
+    start = day.date() if day else date.today()
+    if week:
+        start -= timedelta(days=start.weekday())
+    end = start + timedelta(days=7 if week else 1)
+    filters = {"assigned": "current-user", "no-support": "none"}
+    params = {
+        "fields": EVENTS_FIELDS,
+        "from": datetime.combine(start, time()).isoformat(),
+        "to": datetime.combine(end, time()).isoformat(),
+    }
+    if filter and filter in filters.keys():
+        params["support"] = filters[filter]
+    authenticate()
+    data = get_pages("/events", params=params)
+    events_calendar_view(data, start, end)
+
+
+@app.command()
+def show(id: IdArgument):
+    authenticate()
+    response = session.get(f"/events/{id}", params={"fields": EVENT_FIELDS}, cache=True)
     data = handle_response(response)
     event_show_view(data)
 
 
 @app.command()
 def add_support(
-    ctx: typer.Context,
     id: Annotated[
-        Optional[int], typer.Option("--id", "-i", help="The event id")
+        Optional[int],
+        typer.Option(
+            "--id", "-i", help="The event id", autocompletion=complete_ids("events")
+        ),
     ] = None,
     support: Annotated[
         Optional[int],
         typer.Option("--support", "-s", help="The id of the support user"),
     ] = None,
 ):
-    token = authenticate()
+    authenticate()
     if id is None:
-        ctx.invoke(list, "no-support")
-        id = int(typer.prompt("Please choose an event to add support to"))
+        id = prompt_id(
+            "events", "Please choose an event to add support to", {"support": "none"}
+        )
 
     if support is None:
-        ctx.invoke(users_list, "support")
+        # only the support users free during the event, least loaded first
+        response = session.get(f"/events/{id}/available-supports")
+        available_supports_view(handle_response(response))
         support = int(typer.prompt("Please choose a user to add as support"))
 
-    response = requests.put(
-        f"http://localhost:5000/events/{id}/add-support",
-        headers={
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json",
-        },
-        data=json.dumps({"support_contact_id": support}),
+    response = session.put(
+        f"/events/{id}/add-support",
+        params={"fields": EVENT_FIELDS},
+        json={"support_contact_id": support},
     )
     data = handle_response(response)
     message_show_view({"Success": "Support Added"})
@@ -148,9 +210,11 @@ def add_support(
 
 @app.command()
 def update(
-    ctx: typer.Context,
     id: Annotated[
-        Optional[int], typer.Option("--id", "-i", help="The event id")
+        Optional[int],
+        typer.Option(
+            "--id", "-i", help="The event id", autocompletion=complete_ids("events")
+        ),
     ] = None,
     title: Annotated[
         Optional[str], typer.Option("--title", "-t", help="The event title")
@@ -189,10 +253,11 @@ def update(
         Optional[str], typer.Option("--notes", "-n", help="Notes about the event")
     ] = None,
 ):
-    token = authenticate()
+    authenticate()
     if not id:
-        ctx.invoke(list, "assigned")
-        id = int(typer.prompt("Please choose an event to update"))
+        id = prompt_id(
+            "events", "Please choose an event to update", {"support": "current-user"}
+        )
     payload = {}
     payload["title"] = title if title else None
     payload["event_start"] = event_start if event_start else None
@@ -206,13 +271,10 @@ def update(
         if payload[key] is not None:
             update_event[key] = payload[key]
     if update_event.keys():
-        response = requests.put(
-            f"http://localhost:5000/events/{id}",
-            headers={
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/json",
-            },
-            data=json.dumps(update_event),
+        response = session.put(
+            f"/events/{id}",
+            params={"fields": EVENT_FIELDS},
+            json=update_event,
         )
         data = handle_response(response)
         message_show_view({"Success": "Event Updated"})
@@ -220,20 +282,20 @@ def update(
 
 
 @app.command()
-def delete(id: int):
-    token = authenticate()
-    event = requests.get(
-        f"http://localhost:5000/events/{id}",
-        headers={"Authorization": f"Bearer {token}"},
+def delete(id: IdArgument):
+    authenticate()
+    event = session.get(
+        f"/events/{id}",
+        params={"fields": EVENT_FIELDS},
     )
     data = handle_response(event)
     event_show_view(data)
     typer.confirm(
         "Do you really want to delete this event? There is no going back.", abort=True
     )
-    response = requests.delete(
-        f"http://localhost:5000/events/{id}",
-        headers={"Authorization": f"Bearer {token}"},
+    response = session.delete(
+        f"/events/{id}",
     )
     data = handle_response(response)
+    forget_id("events", id)
     message_show_view(data)
@@ -0,0 +1,164 @@
+import csv
+import json
+from enum import Enum
+from typing import Optional
+from typing_extensions import Annotated
+import typer
+from cli.helpers import authenticate, get_pages, validate_contract_status
+from cli.rbac import authorize
+
+app = typer.Typer()
+
+# Rows are fetched page by page and written as they arrive, so exports run in
+# constant memory whatever the size of the table.
+PAGE_SIZE = 1000
+
+# The CSV columns when no --fields are given, the fields the API serializes
+# by default. The header is fixed up front, whatever the rows hold.
+COLUMNS = {
+    "/users": ["id", "fullname", "email", "phone", "role"],
+    "/clients": [
+        "id",
+        "fullname",
+        "email",
+        "phone",
+        "company",
+        "sales_contact_id",
+        "created_at",
+        "updated_at",
+    ],
+    "/contracts": [
+        "id",
+        "client_id",
+        "sales_contact_id",
+        "total_amount",
+        "remaining_amount",
+        "status",
+        "created_at",
+        "updated_at",
+    ],
+    "/events": [
+        "id",
+        "title",
+        "contract_id",
+        "client_id",
+        "sales_contact_id",
+        "support_contact_id",
+        "event_start",
+        "event_end",
+        "location",
+        "attendees",
+        "notes",
+        "created_at",
+        "updated_at",
+    ],
+}
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+FormatOption = Annotated[
+    ExportFormat, typer.Option("--format", "-f", help="The output format")
+]
+OutputOption = Annotated[
+    typer.FileTextWrite,
+    typer.Option("--output", "-o", help="The output file, defaults to stdout"),
+]
+FieldsOption = Annotated[
+    Optional[str],
+    typer.Option(
+        "--fields",
+        help="Comma separated fields to export, e.g. 'id,client.fullname,remaining_amount'",
+    ),
+]
+
+
+@app.callback()
+def authorize_commands(ctx: typer.Context):
+    # exporting a table needs the same permission as listing it
+    authorize(ctx, f"{ctx.invoked_subcommand}:list")
+
+
+def pick(row, name):
+    # dotted names walk into the expanded relations, a null relation leaves
+    # the cell empty and a list one joins the values of its items
+    key, _, rest = name.partition(".")
+    value = row.get(key) if isinstance(row, dict) else None
+    if not rest:
+        return value
+    if isinstance(value, list):
+        return ", ".join(str(pick(item, rest)) for item in value)
+    return pick(value, rest)
+
+
+def export_rows(path, output, format, fields=None, filters=None):
+    authenticate()
+    if format == ExportFormat.csv:
+        fields = fields or ",".join(COLUMNS[path])
+    params = {"limit": PAGE_SIZE}
+    if fields:
+        params["fields"] = fields
+    if filters:
+        params.update(filters)
+    rows = get_pages(path, params=params)
+    if format == ExportFormat.ndjson:
+        for row in rows:
+            output.write(json.dumps(row) + "\n")
+        return
+    fieldnames = [name.strip() for name in fields.split(",")]
+    writer = csv.DictWriter(output, fieldnames=fieldnames)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow({name: pick(row, name) for name in fieldnames})
+
+
+@app.command()
+def users(
+    format: FormatOption = ExportFormat.ndjson,
+    output: OutputOption = "-",
+    fields: FieldsOption = None,
+):
+    export_rows("/users", output, format, fields)
+
+
+@app.command()
+def clients(
+    format: FormatOption = ExportFormat.ndjson,
+    output: OutputOption = "-",
+    fields: FieldsOption = None,
+):
+    export_rows("/clients", output, format, fields)
+
+
+@app.command()
+def contracts(
+    format: FormatOption = ExportFormat.ndjson,
+    output: OutputOption = "-",
+    fields: FieldsOption = None,
+    status: Annotated[
+        Optional[str],
+        typer.Option(help="Filter the results, values are: 'pending' or 'signed'"),
+    ] = None,
+    owing: Annotated[
+        Optional[bool],
+        typer.Option(help="Only export contracts with a remaining amount"),
+    ] = False,
+):
+    filters = {}
+    if status:
+        filters["status"] = validate_contract_status(status)
+    if owing:
+        filters["remaining-amount"] = "true"
+    export_rows("/contracts", output, format, fields, filters)
+
+
+@app.command()
+def events(
+    format: FormatOption = ExportFormat.ndjson,
+    output: OutputOption = "-",
+    fields: FieldsOption = None,
+):
+    export_rows("/events", output, format, fields)
@@ -0,0 +1,19 @@
+from typing_extensions import Annotated
+import typer
+from cli.helpers import authenticate, handle_response, session
+from cli.views.search import SEARCH_FIELDS, search_results_view
+
+app = typer.Typer()
+
+
+@app.command()
+def search(
+    query: Annotated[str, typer.Argument(help="Words to look for, prefixes match")],
+    limit: Annotated[int, typer.Option("--limit", "-l", help="Results per table")] = 10,
+):
+    authenticate()
+    response = session.get(
+        "/search", params={"q": query, "limit": limit, "fields": SEARCH_FIELDS}
+    )
+    data = handle_response(response)
+    search_results_view(data)
@@ -1,16 +1,26 @@
-import json
 import typer
-import requests
-from cli.helpers import authenticate, handle_response, sanitize_fullname, validate_role
+from cli.helpers import (
+    authenticate,
+    get_pages,
+    handle_response,
+    sanitize_fullname,
+    session,
+    validate_role,
+)
 from cli.views.users import users_list_view, user_show_view
 from cli.views.shared import message_show_view
 from email_validator import validate_email, EmailNotValidError
 from typing import Optional
 from typing_extensions import Annotated
+from cli.completion import complete_ids, forget_id
 from cli.rbac import authorize
 
 app = typer.Typer()
 
+IdArgument = Annotated[
+    int, typer.Argument(help="The user id", autocompletion=complete_ids("users"))
+]
+
 
 @app.callback()
 def authorize_commands(ctx: typer.Context):
@@ -66,14 +76,10 @@ def create(
         "role": department,
         "password": password,
     }
-    token = authenticate()
-    response = requests.post(
-        "http://localhost:5000/users",
-        headers={
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json",
-        },
-        data=json.dumps(new_user),
+    authenticate()
+    response = session.post(
+        "/users",
+        json=new_user,
     )
     data = handle_response(response)
     message_show_view({"Success": "User Created"})
@@ -94,29 +100,31 @@ def list(
         dept = validate_role(department)
         active_filters += f"?dept={dept}"
 
-    token = authenticate()
-    response = requests.get(
-        f"http://localhost:5000/users{active_filters}",
-        headers={"Authorization": f"Bearer {token}"},
-    )
-    data = handle_response(response)
+    authenticate()
+    data = get_pages(f"/users{active_filters}", cache=True)
     users_list_view(data)
 
 
 @app.command()
-def show(id: Annotated[int, typer.Argument()]):
-    token = authenticate()
-    response = requests.get(
-        f"http://localhost:5000/users/{id}",
-        headers={"Authorization": f"Bearer {token}"},
-    )
+def show(id: IdArgument):
+    authenticate()
+    response = session.get(f"/users/{id}", cache=True)
     data = handle_response(response)
     user_show_view(data)
 
 
 @app.command()
 def update(
-    id: Annotated[int, typer.Option("--id", "-i", prompt=True, help="The user id")],
+    id: Annotated[
+        int,
+        typer.Option(
+            "--id",
+            "-i",
+            prompt=True,
+            help="The user id",
+            autocompletion=complete_ids("users"),
+        ),
+    ],
     fullname: Annotated[
         Optional[str],
         typer.Option("--fullname", "-n", help="The user full name to update"),
@@ -168,14 +176,10 @@ def update(
         if payload[key] is not None:
             update_user[key] = payload[key]
     if update_user.keys():
-        token = authenticate()
-        response = requests.put(
-            f"http://localhost:5000/users/{id}",
-            headers={
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/json",
-            },
-            data=json.dumps(update_user),
+        authenticate()
+        response = session.put(
+            f"/users/{id}",
+            json=update_user,
         )
         data = handle_response(response)
         message_show_view({"Success": "User Updated"})
@@ -185,20 +189,27 @@ def update(
 
 
 @app.command()
-def delete(id: Annotated[int, typer.Argument()]):
-    token = authenticate()
-    user = requests.get(
-        f"http://localhost:5000/users/{id}",
-        headers={"Authorization": f"Bearer {token}"},
+def logout(id: IdArgument):
+    authenticate()
+    response = session.delete(f"/users/{id}/tokens")
+    data = handle_response(response)
+    message_show_view(data)
+
+
+@app.command()
+def delete(id: IdArgument):
+    authenticate()
+    user = session.get(
+        f"/users/{id}",
     )
     data = handle_response(user)
     user_show_view(data)
     typer.confirm(
         "Do you really want to delete this user? There is no going back", abort=True
     )
-    response = requests.delete(
-        f"http://localhost:5000/users/{id}",
-        headers={"Authorization": f"Bearer {token}"},
+    response = session.delete(
+        f"/users/{id}",
     )
     data = handle_response(response)
+    forget_id("users", id)
     message_show_view(data)
@@ -1,16 +1,131 @@
+import csv
+import hashlib
 import html
+import json
+import os
+import re
+from datetime import datetime, timezone
 from pathlib import Path
+from urllib.parse import urljoin
 
 import requests
 import typer
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from .views.shared import message_show_view
+from .views.shared import lookup_view, message_show_view
+
+try:
+    import readline
+except ImportError:
+    # no line editing on this platform, prompts work without completion
+    readline = None
 
 APP_NAME = "epicevent-cli"
 app_dir = typer.get_app_dir(APP_NAME)
 app_dir_path = Path(app_dir)
 app_dir_path.mkdir(parents=True, exist_ok=True)
 token_path: Path = Path(app_dir) / "token.txt"
+permissions_path: Path = Path(app_dir) / "permissions.json"
+cache_path: Path = Path(app_dir) / "cache"
+# entity id indexes for shell completion, see cli/completion.py
+ids_path: Path = Path(app_dir) / "ids"
+
+API_URL = os.environ.get("EPICEVENT_API_URL", "http://localhost:5000")
+
+
+class ApiSession(requests.Session):
+    # Keep-alive session resolving paths like "/clients" against the API url.
+    # GETs made with `cache=True` keep the responses carrying an ETag in
+    # `cache_dir` and revalidate them with If-None-Match, a 304 is answered
+    # from the local copy. Only the interactive list and show commands opt in,
+    # exports and completion refreshes would just churn the cache.
+
+    def __init__(self, base_url, cache_dir=None, cache_size=500):
+        super().__init__()
+        self.base_url = base_url.rstrip("/") + "/"
+        self.cache_dir = cache_dir
+        self.cache_size = cache_size
+        retries = Retry(
+            total=3,
+            backoff_factor=0.2,
+            status_forcelist=[502, 503, 504],
+            allowed_methods=["GET", "PUT", "DELETE"],
+        )
+        adapter = HTTPAdapter(max_retries=retries)
+        self.mount("http://", adapter)
+        self.mount("https://", adapter)
+
+    def request(self, method, url, *args, cache=False, **kwargs):
+        url = urljoin(self.base_url, url.lstrip("/"))
+        if (
+            not cache
+            or method.upper() != "GET"
+            or self.cache_dir is None
+            or kwargs.get("stream")
+        ):
+            return super().request(method, url, *args, **kwargs)
+        return self.cached_get(url, *args, **kwargs)
+
+    def cached_get(self, url, *args, **kwargs):
+        # the cache key covers the full url and the identity asking for it
+        full_url = requests.Request("GET", url, params=kwargs.get("params")).prepare()
+        key = hashlib.sha1(
+            f"{self.headers.get('Authorization')} {full_url.url}".encode()
+        ).hexdigest()
+        entry_path = self.cache_dir / f"{key}.json"
+        entry = None
+        if entry_path.is_file():
+            try:
+                with open(entry_path, "r") as file:
+                    entry = json.load(file)
+            except ValueError:
+                entry = None
+        if entry is not None:
+            kwargs["headers"] = {
+                **(kwargs.get("headers") or {}),
+                "If-None-Match": entry["etag"],
+            }
+        response = super().request("GET", url, *args, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            response.status_code = 200
+            response.headers.update(entry["headers"])
+            response._content = entry["content"].encode("utf-8")
+            response.encoding = "utf-8"
+            entry_path.touch()
+        elif response.status_code == 200 and "ETag" in response.headers:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(entry_path, "w") as file:
+                json.dump(
+                    {
+                        "etag": response.headers["ETag"],
+                        "headers": {
+                            name: value
+                            for name, value in response.headers.items()
+                            if name in ("Content-Type", "Link", "X-Next-Cursor")
+                        },
+                        "content": response.content.decode("utf-8"),
+                    },
+                    file,
+                )
+            self.prune_cache()
+        return response
+
+    def prune_cache(self):
+        # keep the most recently used entries
+        entries = sorted(
+            self.cache_dir.glob("*.json"), key=lambda path: path.stat().st_mtime
+        )
+        for path in entries[: max(0, len(entries) - self.cache_size)]:
+            path.unlink(missing_ok=True)
+
+    def clear_cache(self):
+        if self.cache_dir is not None:
+            for path in self.cache_dir.glob("*.json"):
+                path.unlink(missing_ok=True)
+
+
+session = ApiSession(API_URL, cache_dir=cache_path)
 
 
 def log_user_in():
@@ -19,21 +134,61 @@ def log_user_in():
     username = typer.prompt("Username (email)")
     password = typer.prompt("Password", hide_input=True)
 
-    response = requests.post("http://localhost:5000/tokens", auth=(username, password))
+    response = session.post("/tokens", auth=(username, password))
     if response.status_code == 200:
         token = response.json()["token"]
         with open(token_path, "w") as file:
             file.write(token)
+        session.headers["Authorization"] = f"Bearer {token}"
+        session.clear_cache()
+        clear_id_indexes()
+        fetch_permissions()
         print("Logged in")
 
     return token
 
 
+def clear_id_indexes():
+    # another user may not see the same entities
+    for path in ids_path.glob("*.json"):
+        path.unlink(missing_ok=True)
+
+
+def fetch_permissions():
+    # Fetch the user capability set once and keep it until the token expires
+    response = session.get("/authorizations")
+    if not response.ok:
+        return None
+    permissions = response.json()
+    with open(permissions_path, "w") as file:
+        json.dump(permissions, file)
+    return permissions
+
+
+def load_permissions():
+    if not permissions_path.is_file():
+        return None
+    try:
+        with open(permissions_path, "r") as file:
+            permissions = json.load(file)
+        expiration = datetime.fromisoformat(permissions["expiration"])
+    except (ValueError, KeyError):
+        return None
+    if expiration <= datetime.now(timezone.utc):
+        return None
+    return permissions
+
+
+def clear_permissions():
+    permissions_path.unlink(missing_ok=True)
+
+
 def authenticate():
     token = None
     if token_path.is_file():
         with open(token_path, "r") as file:
             token = file.read()
+        session.headers["Authorization"] = f"Bearer {token}"
     else:
         token = log_user_in()
 
@@ -43,13 +198,16 @@ def authenticate():
 def handle_response(response):
     if response.status_code == 200 or response.status_code == 201:
         return response.json()
-    elif response.status_code == 400:
+    elif response.status_code in (400, 409):
         message_show_view(response.json())
         raise typer.Exit()
     elif response.status_code == 401:
+        clear_permissions()
         message_show_view({"Error": "You don't have access"})
         raise typer.Exit()
     elif response.status_code == 403:
+        # the local capability set is stale, refetch it on the next command
+        clear_permissions()
         message_show_view({"Error": "You are not authorized"})
         raise typer.Exit()
     elif response.status_code == 404:
@@ -60,6 +218,85 @@ def handle_response(response):
         raise typer.Exit()
 
 
+def prompt_id(entity, text, params=None):
+    # Ask for an entity id, names can be typed instead: Tab completes them
+    # through /lookup and a prefix matching several entities lists them.
+    authenticate()
+
+    def lookup(prefix):
+        return session.get(
+            f"/lookup/{entity}", params={**(params or {}), "prefix": prefix}
+        )
+
+    def complete(prefix, state):
+        if state == 0:
+            response = lookup(prefix)
+            rows = response.json() if response.status_code == 200 else []
+            complete.matches = [f"{row['label']} #{row['id']}" for row in rows]
+        return complete.matches[state] if state < len(complete.matches) else None
+
+    if readline is not None:
+        readline.set_completer(complete)
+        readline.set_completer_delims("")
+        if "libedit" in (readline.__doc__ or ""):
+            readline.parse_and_bind("bind ^I rl_complete")
+        else:
+            readline.parse_and_bind("tab: complete")
+    try:
+        while True:
+            answer = typer.prompt(text).strip()
+            if answer.isdigit():
+                return int(answer)
+            # a completed "label #id"
+            match = re.search(r"#(\d+)$", answer)
+            if match:
+                return int(match.group(1))
+            rows = handle_response(lookup(answer))
+            if len(rows) == 1:
+                return rows[0]["id"]
+            lookup_view(rows)
+    finally:
+        if readline is not None:
+            readline.set_completer(None)
+
+
+def get_pages(url, params=None, cache=False):
+    # Lazily follow the API "next" links, one page at a time
+    while url:
+        response = session.get(url, params=params, cache=cache)
+        yield from handle_response(response)
+        # the next link already carries the query string
+        url = response.links.get("next", {}).get("url")
+        params = None
+
+
+def import_rows(path, file, batch_size=1000):
+    # Send the CSV rows to a bulk endpoint in batches, without loading the file
+    report = {"created": 0, "errors": []}
+
+    def send(batch, start):
+        response = session.post(path, json=batch)
+        data = handle_response(response)
+        report["created"] += data["created"]
+        for error in data["errors"]:
+            # line number in the file, the header being line 1
+            report["errors"].append(
+                {"line": start + error["row"] + 2, "error": error["error"]}
+            )
+
+    batch = []
+    start = 0
+    for row in csv.DictReader(file):
+        batch.append(row)
+        if len(batch) == batch_size:
+            send(batch, start)
+            start += len(batch)
+            batch = []
+    if batch:
+        send(batch, start)
+    return report
+
+
 def format_phone(phone: str):
     return f"{phone[:2]}-{phone[2:4]}-{phone[4:6]}-{phone[6:8]}-{phone[8:]}"
 
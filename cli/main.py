@@ -1,12 +1,16 @@
 import os
 from pathlib import Path
 
+import requests
 import typer
 
 from .controllers.clients import app as clients_app
 from .controllers.contracts import app as contracts_app
 from .controllers.events import app as events_app
+from .controllers.export import app as export_app
+from .controllers.search import app as search_app
 from .controllers.users import app as users_app
+from .helpers import authenticate, clear_id_indexes, session
 from .version import app as version_app
 
 APP_NAME = "epicevent-cli"
@@ -18,6 +22,8 @@ app.add_typer(clients_app, name="clients")
 app.add_typer(contracts_app, name="contracts")
 app.add_typer(events_app, name="events")
 app.add_typer(users_app, name="users")
+app.add_typer(export_app, name="export")
+app.add_typer(search_app)
 
 
 @app.command()
@@ -26,9 +32,19 @@ def logout():
     app_dir_path = Path(app_dir)
     app_dir_path.mkdir(parents=True, exist_ok=True)
     token_path: Path = Path(app_dir) / "token.txt"
+    permissions_path: Path = Path(app_dir) / "permissions.json"
     if token_path.is_file():
+        # revoke the token server side, the local files go whatever the answer
+        authenticate()
+        try:
+            session.delete("/tokens")
+        except requests.RequestException:
+            pass
         try:
             os.remove(token_path)
+            permissions_path.unlink(missing_ok=True)
+            session.clear_cache()
+            clear_id_indexes()
             print("Logged out")
         except Exception:
             print("Error")
@@ -1,49 +1,21 @@
-import json
-
-import requests
 import typer
 
-from cli.helpers import authenticate, log_user_in
+from cli.helpers import authenticate, fetch_permissions, load_permissions, log_user_in
 from cli.views.shared import message_show_view
 
 
-def authorize(ctx: typer.Context):
-    object_action = f"{ctx.command.name}:{ctx.invoked_subcommand}"
-    token = authenticate()
-    authorized = requests.post(
-        "http://localhost:5000/authorizations",
-        headers={
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json",
-        },
-        data=json.dumps({"target": object_action}),
-    )
-    if authorized.status_code == 401:
-        return log_user_in()
-    if not authorized.ok:
+def authorize(ctx: typer.Context, object_action=None):
+    # Commands are authorized locally against the capability set fetched at
+    # login, it is only refetched once it expires or the API answers 401/403.
+    if object_action is None:
+        object_action = f"{ctx.command.name}:{ctx.invoked_subcommand}"
+    authenticate()
+    permissions = load_permissions()
+    if permissions is None:
+        permissions = fetch_permissions()
+    if permissions is None:
+        log_user_in()
+        permissions = load_permissions()
+    if permissions is None or object_action not in permissions["permissions"]:
         message_show_view({"Error": "You are not authorized"})
         raise typer.Exit()
-
-
-# def authorize(object_action=None):
-#     def decorator_authorize(func):
-#         @functools.wraps(func)
-#         def wrapper(*args, **kwargs):
-#             if object_action is not None:
-#                 token = authenticate()
-#                 authorized = requests.post(
-#                     "http://localhost:5000/authorizations",
-#                     headers={
-#                         "Authorization": f"Bearer {token}",
-#                         "Content-Type": "application/json",
-#                     },
-#                     data=json.dumps({"target": object_action}),
-#                 )
-#                 if not authorized.ok:
-#                     message_show_view({"Error": "You are not authorized"})
-#                     raise typer.Exit()
-#             return func(*args, **kwargs)
-#
-#         return wrapper
-#
-#     return decorator_authorize
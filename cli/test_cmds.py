@@ -1,5 +1,11 @@
+import io
+
+from requests import Response
+from requests.adapters import HTTPAdapter
 from typer.testing import CliRunner
 
+from .controllers import export
+from .helpers import ApiSession
 from .main import app
 
 runner = CliRunner()
@@ -92,3 +98,59 @@ def test_events_list_with_filters():
     )
     assert result.exit_code == 0
     assert "Events" in result.stdout
+
+
+def test_export_csv_relations(monkeypatch):
+    rows = [
+        {"id": 1, "client": {"fullname": "Kate"}, "events": [{"title": "Gala"}]},
+        {"id": 2, "client": None, "events": [{"title": "A"}, {"title": "B"}]},
+    ]
+    monkeypatch.setattr(export, "authenticate", lambda: None)
+    monkeypatch.setattr(export, "get_pages", lambda path, params: iter(rows))
+    output = io.StringIO()
+    fields = "id,client.fullname,events.title"
+    export.export_rows("/contracts", output, export.ExportFormat.csv, fields)
+    assert output.getvalue().splitlines() == [
+        "id,client.fullname,events.title",
+        "1,Kate,Gala",
+        '2,,"A, B"',
+    ]
+
+
+def test_export_csv_default_columns(monkeypatch):
+    requested = {}
+    monkeypatch.setattr(export, "authenticate", lambda: None)
+    monkeypatch.setattr(
+        export, "get_pages", lambda path, params: requested.update(params) or []
+    )
+    output = io.StringIO()
+    export.export_rows("/users", output, export.ExportFormat.csv)
+    assert requested["fields"] == "id,fullname,email,phone,role"
+    assert output.getvalue().splitlines() == ["id,fullname,email,phone,role"]
+
+
+class ETagAdapter(HTTPAdapter):
+    # answers every request with the same tagged body, 304 when revalidated
+    def send(self, request, **kwargs):
+        response = Response()
+        response.request = request
+        response.url = request.url
+        if request.headers.get("If-None-Match") == '"v1"':
+            response.status_code = 304
+        else:
+            response.status_code = 200
+            response._content = b"[]"
+            response.headers["ETag"] = '"v1"'
+        return response
+
+
+def test_session_caches_only_on_request(tmp_path):
+    session = ApiSession("http://api.test", cache_dir=tmp_path)
+    session.mount("http://", ETagAdapter())
+    session.get("/clients")
+    assert list(tmp_path.glob("*.json")) == []
+    session.get("/clients", cache=True)
+    assert len(list(tmp_path.glob("*.json"))) == 1
+    response = session.get("/clients", cache=True)
+    assert response.status_code == 200
+    assert response.json() == []
@@ -2,6 +2,9 @@ from rich.console import Console
 from rich.table import Table
 from cli.helpers import format_phone
 
+# Only ask the API for the columns the tables show
+CLIENT_FIELDS = "id,fullname,email,phone,company,sales_contact.fullname"
+
 
 def clients_list_view(clients):
     table = Table(title="Clients")
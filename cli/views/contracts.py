@@ -2,6 +2,11 @@ from rich.console import Console
 from rich.table import Table
 from cli.helpers import format_phone
 
+# Only ask the API for the columns the tables show
+CONTRACT_FIELDS = (
+    "id,client.fullname,sales_contact.fullname,total_amount,remaining_amount,status"
+)
+
 
 def contracts_list_view(contracts):
     table = Table(title="Contracts")
@@ -46,3 +51,45 @@ def contract_show_view(contract):
 
     console = Console()
     console.print(table)
+
+
+def contract_stats_view(stats):
+    console = Console()
+
+    table = Table(title="Contracts")
+    table.add_column("Status")
+    table.add_column("Count")
+    table.add_column("Total")
+    table.add_column("Due")
+    for status, row in stats["by_status"].items():
+        table.add_row(
+            status,
+            str(row["count"]),
+            str(row["total_amount"]),
+            str(row["remaining_amount"]),
+        )
+    table.add_row(
+        "all",
+        str(stats["count"]),
+        str(stats["total_amount"]),
+        str(stats["remaining_amount"]),
+    )
+    console.print(table)
+
+    for title, key in [
+        ("Due by Sales Rep", "by_sales_contact"),
+        ("Due by Client", "by_client"),
+    ]:
+        table = Table(title=title)
+        table.add_column("ID")
+        table.add_column("Full Name")
+        table.add_column("Contracts")
+        table.add_column("Due")
+        for row in stats[key]:
+            table.add_row(
+                str(row["id"]),
+                str(row["fullname"]),
+                str(row["count"]),
+                str(row["remaining_amount"]),
+            )
+        console.print(table)
@@ -1,7 +1,15 @@
+from datetime import timedelta
 from rich.console import Console
 from rich.table import Table
 from cli.helpers import format_phone
 
+# Only ask the API for the columns the tables show
+EVENTS_FIELDS = (
+    "id,title,contract_id,client.fullname,sales_contact.fullname,"
+    "support_contact.fullname,event_start,event_end,location"
+)
+EVENT_FIELDS = f"{EVENTS_FIELDS},notes"
+
 
 def events_list_view(events):
     table = Table(title="Events", caption="See details for notes about the event")
@@ -19,7 +27,7 @@ def events_list_view(events):
         table.add_row(
             str(event["id"]),
             str(event["title"]),
-            str(event["contract"]["id"]),
+            str(event["contract_id"]),
             str(event["client"]["fullname"]),
             str(event["sales_contact"]["fullname"]),
             str(
@@ -49,7 +57,7 @@ def event_show_view(event):
     table.add_row(
         str(event["id"]),
         str(event["title"]),
-        str(event["contract"]["id"]),
+        str(event["contract_id"]),
         str(event["client"]["fullname"]),
         str(event["sales_contact"]["fullname"]),
         str(event["support_contact"]["fullname"] if event["support_contact"] else ""),
@@ -63,3 +71,63 @@ def event_show_view(event):
     if event["notes"]:
         console.print("Notes :")
         console.print(str(event["notes"]))
+
+
+def events_calendar_view(events, start, end):
+    last_day = end - timedelta(days=1)
+    title = (
+        f"Events from {start} to {last_day}"
+        if last_day > start
+        else f"Events on {start}"
+    )
+    table = Table(title=title)
+    table.add_column("Day")
+    table.add_column("Start")
+    table.add_column("End")
+    table.add_column("ID")
+    table.add_column("Title")
+    table.add_column("Client")
+    table.add_column("Support Rep")
+    table.add_column("Location")
+
+    day = None
+    for event in sorted(events, key=lambda event: event["event_start"]):
+        event_day = event["event_start"][:10]
+        table.add_row(
+            event_day if event_day != day else "",
+            str(event["event_start"]),
+            str(event["event_end"]),
+            str(event["id"]),
+            str(event["title"]),
+            str(event["client"]["fullname"]),
+            str(
+                event["support_contact"]["fullname"] if event["support_contact"] else ""
+            ),
+            str(event["location"]),
+        )
+        day = event_day
+
+    console = Console()
+    console.print(table)
+
+
+def available_supports_view(users):
+    table = Table(
+        title="Available Support Users",
+        caption="Load: events still running from the event start",
+    )
+    table.add_column("ID")
+    table.add_column("Full Name")
+    table.add_column("Email")
+    table.add_column("Load")
+
+    for user in users:
+        table.add_row(
+            str(user["id"]),
+            str(user["fullname"]),
+            str(user["email"]),
+            str(user["load"]),
+        )
+
+    console = Console()
+    console.print(table)
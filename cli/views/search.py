@@ -0,0 +1,46 @@
+from rich.console import Console
+from rich.table import Table
+
+# fields of both clients and events, each only has some of them
+SEARCH_FIELDS = "id,fullname,company,email,title,location,event_start"
+
+
+def search_results_view(results):
+    console = Console()
+    if not results["clients"] and not results["events"]:
+        console.print("No results")
+        return
+
+    if results["clients"]:
+        table = Table(title="Clients")
+        table.add_column("ID")
+        table.add_column("Full Name")
+        table.add_column("Company")
+        table.add_column("Email")
+        table.add_column("Score")
+        for client in results["clients"]:
+            table.add_row(
+                str(client["id"]),
+                str(client["fullname"]),
+                str(client["company"]),
+                str(client["email"]),
+                str(client["score"]),
+            )
+        console.print(table)
+
+    if results["events"]:
+        table = Table(title="Events", caption="See details for notes about the event")
+        table.add_column("ID")
+        table.add_column("Title")
+        table.add_column("Location")
+        table.add_column("Start")
+        table.add_column("Score")
+        for event in results["events"]:
+            table.add_row(
+                str(event["id"]),
+                str(event["title"]),
+                str(event["location"]),
+                str(event["event_start"]),
+                str(event["score"]),
+            )
+        console.print(table)
@@ -16,3 +16,36 @@ def message_show_view(data):
 
     console = Console()
     console.print(table)
+
+
+def import_report_view(report):
+    console = Console()
+    console.print(f"Created: {report['created']}")
+    if not report["errors"]:
+        return
+    table = Table(title="Rejected rows")
+    table.add_column("Line")
+    table.add_column("Error")
+
+    for error in report["errors"]:
+        table.add_row(
+            str(error["line"]),
+            str(error["error"]),
+        )
+
+    console.print(table)
+
+
+def lookup_view(rows):
+    console = Console()
+    if not rows:
+        console.print("No match, type an ID or the start of a name")
+        return
+    table = Table(title="Matches", caption="Type an ID or a longer name")
+    table.add_column("ID")
+    table.add_column("Name")
+
+    for row in rows:
+        table.add_row(str(row["id"]), str(row["label"]))
+
+    console.print(table)